@@ -291,6 +291,156 @@ class Grid:
         return bools
 
 
+class BitGrid(Grid):
+    """
+    A Grid of booleans stored as the bits of one Python int, for the food of
+    a game state.
+
+    Cell (x, y) is bit x * height + y, the same numbering Grid.__hash__ uses,
+    so a BitGrid hashes like the equal Grid. grid[x] returns a lightweight
+    view of column x, so grid[x][y] reads and writes work as with a Grid.
+    The number of True cells and the hash are cached, and copies share the
+    int, so copy(), count() and hashing are O(1), and writing a cell costs
+    one int operation over the words of the grid instead of a list copy.
+    """
+
+    def __init__(self, width, height, initial_value=False, bits=0):
+        if initial_value not in [False, True]:
+            raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        if initial_value:
+            bits = (1 << (width * height)) - 1
+        self.bits = bits
+        self._count = bin(bits).count('1')
+        self._hash = None
+
+    @property
+    def data(self):
+        """The cells as a new list of columns, as in Grid.data."""
+        return [list(self[x]) for x in range(self.width)]
+
+    def __str__(self):
+        # Reads the bits directly; the data property rebuilds every column
+        mask = (1 << self.height) - 1
+        columns = [(self.bits >> (x * self.height)) & mask for x in range(self.width)]
+        out = [['T' if (column >> y) & 1 else 'F' for column in columns] for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.width
+        if not 0 <= x < self.width:
+            raise IndexError('grid column out of range')
+        return BitGridColumn(self, x)
+
+    def __setitem__(self, x, column):
+        for y, value in enumerate(column):
+            self.set(x, y, value)
+
+    def get(self, x, y):
+        return (self.bits >> (x * self.height + y)) & 1 == 1
+
+    def set(self, x, y, value):
+        bit = 1 << (x * self.height + y)
+        if value:
+            if not self.bits & bit:
+                self.bits |= bit
+                self._count += 1
+                self._hash = None
+        elif self.bits & bit:
+            self.bits ^= bit
+            self._count -= 1
+            self._hash = None
+
+    def __eq__(self, other):
+        if other is None:
+            return False
+        if isinstance(other, BitGrid):
+            return self.bits == other.bits and self.width == other.width and self.height == other.height
+        return self.data == other.data
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self.bits)
+        return self._hash
+
+    def copy(self):
+        g = BitGrid(self.width, self.height)
+        g.bits = self.bits
+        g._count = self._count
+        g._hash = self._hash
+        return g
+
+    def deep_copy(self):
+        return self.copy()
+
+    def shallow_copy(self):
+        return self.copy()
+
+    def count(self, item=True):
+        if item:
+            return self._count
+        return self.width * self.height - self._count
+
+    def as_list(self, key=True):
+        bits = self.bits if key else ~self.bits & ((1 << (self.width * self.height)) - 1)
+        list_coordinates = []
+        while bits:
+            low_bit = bits & -bits
+            list_coordinates.append(divmod(low_bit.bit_length() - 1, self.height))
+            bits ^= low_bit
+        return list_coordinates
+
+
+class BitGridColumn:
+    """
+    Column x of a BitGrid, so that grid[x][y] reads and writes the grid.
+    """
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        height = self.grid.height
+        if y < 0:
+            y += height
+        if not 0 <= y < height:
+            raise IndexError('grid row out of range')
+        return self.grid.get(self.x, y)
+
+    def __setitem__(self, y, value):
+        if y < 0:
+            y += self.grid.height
+        self.grid.set(self.x, y, value)
+
+    def __len__(self):
+        return self.grid.height
+
+    def __iter__(self):
+        column = self.grid.bits >> (self.x * self.grid.height)
+        for y in range(self.grid.height):
+            yield (column >> y) & 1 == 1
+
+    def count(self, item=True):
+        return sum(1 for value in self if value == item)
+
+
+def to_bit_grid(grid):
+    """Returns a BitGrid with the same cells as a Grid."""
+    bits = 0
+    for x in range(grid.width):
+        for y in range(grid.height):
+            if grid[x][y]:
+                bits |= 1 << (x * grid.height + y)
+    return BitGrid(grid.width, grid.height, bits=bits)
+
+
 def reconstitute_grid(bit_rep):
     if type(bit_rep) is not type((1, 2)):
         return bit_rep
@@ -391,19 +541,81 @@ class Actions:
     get_successor = staticmethod(get_successor)
 
 
+# Zobrist keys: a 64-bit key per feature of a state (an agent state, a food
+# cell, a capsule or the score). The feature's fields are packed into one
+# integer and scrambled with the splitmix64 finalizer, which maps distinct
+# integers to distinct keys, so every process derives the same keys without
+# storing them. A state's hash is the XOR of the keys of its features.
+_ZOBRIST_MASK = (1 << 64) - 1
+_ZOBRIST_AGENT, _ZOBRIST_FOOD, _ZOBRIST_CAPSULE, _ZOBRIST_SCORE = range(4)
+# Direction 0 stands for an agent without a configuration
+_ZOBRIST_DIRECTIONS = {Directions.NORTH: 1, Directions.SOUTH: 2, Directions.EAST: 3,
+                       Directions.WEST: 4, Directions.STOP: 5}
+
+
+def zobrist_key(kind, value):
+    """
+    Returns the key of a feature of the given kind whose other fields are
+    packed into the integer 'value'.
+    """
+    key = ((value << 2 | kind) + 0x9E3779B97F4A7C15) & _ZOBRIST_MASK
+    key = (key ^ (key >> 30)) * 0xBF58476D1CE4E5B9 & _ZOBRIST_MASK
+    key = (key ^ (key >> 27)) * 0x94D049BB133111EB & _ZOBRIST_MASK
+    return key ^ (key >> 31)
+
+
+def cell_zobrist_key(kind, position):
+    x, y = position
+    return zobrist_key(kind, x << 16 | y)
+
+
+def agent_zobrist_key(index, agent_state):
+    configuration = agent_state.configuration
+    if configuration is None:
+        return zobrist_key(_ZOBRIST_AGENT, index)
+    # Scared ghosts move at half speed, so positions are multiples of 0.5
+    x, y = configuration.pos
+    value = int(x * 2) << 16 | int(y * 2)
+    value = value << 3 | _ZOBRIST_DIRECTIONS.get(configuration.direction, 5)
+    value = value << 8 | agent_state.scared_timer
+    return zobrist_key(_ZOBRIST_AGENT, value << 8 | index)
+
+
+def score_zobrist_key(score):
+    # Not hash(score): hash(-1) == hash(-2)
+    if score != int(score):
+        score = hash(score)
+    return zobrist_key(_ZOBRIST_SCORE, int(score) & _ZOBRIST_MASK >> 2)
+
+
 class GameStateData:
 
     def __init__(self, prev_state=None):
         """
         Generates a new data packet by copying information from its predecessor.
+
+        The new packet shares the food grid, the capsule list and every agent
+        state with its predecessor (only the list of agent states is new).
+        Rules that change one of them must first get a private copy with
+        get_mutable_food, get_mutable_capsules or get_mutable_agent_state, so
+        that the predecessor is never changed.
         """
         if prev_state is not None:
-            self.food = prev_state.food.shallow_copy()
-            self.capsules = prev_state.capsules[:]
-            self.agent_states = self.copy_agent_states(prev_state.agent_states)
+            self.food = prev_state.food
+            self.food_positions = prev_state.food_positions
+            self.num_food = prev_state.num_food
+            self.capsules = prev_state.capsules
+            self.agent_states = prev_state.agent_states[:]
             self.layout = prev_state.layout
             self._eaten = prev_state._eaten
             self.score = prev_state.score
+            self._zobrist_hash = prev_state._zobrist_hash
+        else:
+            self._zobrist_hash = None
+        # What this packet has copied from its predecessor and may change
+        self._owned_food = prev_state is None
+        self._owned_capsules = prev_state is None
+        self._owned_agents = set()
 
         self._food_eaten = None
         self._food_added = None
@@ -416,6 +628,10 @@ class GameStateData:
     def deep_copy(self):
         state = GameStateData(self)
         state.food = self.food.deep_copy()
+        state.capsules = self.capsules[:]
+        state.agent_states = self.copy_agent_states(self.agent_states)
+        state._owned_food = state._owned_capsules = True
+        state._owned_agents = set(range(len(state.agent_states)))
         state.layout = self.layout.deep_copy()
         state._agent_moved = self._agent_moved
         state._food_eaten = self._food_eaten
@@ -429,6 +645,123 @@ class GameStateData:
             copied_states.append(agentState.copy())
         return copied_states
 
+    def get_mutable_agent_state(self, index):
+        """
+        Returns the state of agent 'index', copied first if it is still
+        shared with the predecessor.
+        """
+        if index not in self._owned_agents:
+            self.agent_states[index] = self.agent_states[index].copy()
+            self._owned_agents.add(index)
+        return self.agent_states[index]
+
+    def get_mutable_food(self):
+        """Returns the food grid, copied first if it is still shared."""
+        if not self._owned_food:
+            self.food = self.food.copy()
+            self._owned_food = True
+        return self.food
+
+    def get_mutable_capsules(self):
+        """Returns the capsule list, copied first if it is still shared."""
+        if not self._owned_capsules:
+            self.capsules = self.capsules[:]
+            self._owned_capsules = True
+        return self.capsules
+
+    def remove_food(self, position):
+        """
+        Removes the food at 'position' from the grid, the set of food
+        positions and the food count. The set is a frozenset shared with the
+        successors, so it is replaced rather than changed.
+        """
+        x, y = position
+        self.get_mutable_food()[x][y] = False
+        self.food_positions = self.food_positions - {position}
+        self.num_food -= 1
+        if self._zobrist_hash is not None:
+            self._zobrist_hash ^= cell_zobrist_key(_ZOBRIST_FOOD, (x, y))
+
+    def remove_capsule(self, position):
+        self.get_mutable_capsules().remove(position)
+        if self._zobrist_hash is not None:
+            self._zobrist_hash ^= cell_zobrist_key(_ZOBRIST_CAPSULE, position)
+
+    def get_zobrist_hash(self):
+        """
+        Returns the 64-bit Zobrist hash of the agent states (positions,
+        directions and scared timers), the food, the capsules and the score,
+        computing it from scratch only if no predecessor had it.
+
+        The hash a successor updates from its predecessor's equals the hash
+        computed from scratch:
+
+        >>> import random, layout, pacman
+        >>> def from_scratch(data):
+        ...     data = data.deep_copy()
+        ...     data._zobrist_hash = None
+        ...     return data.get_zobrist_hash()
+        >>> random.seed(0)
+        >>> failures = []
+        >>> for layout_name in ['mediumClassic', 'trickyClassic'] * 3:
+        ...     state = pacman.GameState()
+        ...     state.initialize(layout.get_layout(layout_name), 2)
+        ...     for ply in range(300):
+        ...         if state.is_win() or state.is_lose(): break
+        ...         agent_index = ply % state.get_num_agents()
+        ...         actions = state.get_legal_actions(agent_index)
+        ...         for action in actions:
+        ...             successor = state.generate_successor(agent_index, action)
+        ...             if successor.data.get_zobrist_hash() != from_scratch(successor.data):
+        ...                 failures.append((layout_name, ply, agent_index, action))
+        ...         state = state.generate_successor(agent_index, random.choice(actions))
+        >>> failures
+        []
+
+        Eating a capsule removes its key and scares the ghosts, which random
+        play rarely does:
+
+        >>> state = pacman.GameState()
+        >>> state.initialize(layout.Layout(['%%%%%%', '%Po.G%', '%%%%%%']), 1)
+        >>> state = state.generate_successor(0, Directions.EAST)
+        >>> state.data._capsule_eaten, state.get_ghost_state(1).scared_timer
+        ((2, 1), 40)
+        >>> state.data.get_zobrist_hash() == from_scratch(state.data)
+        True
+
+        Keys are derived from the features alone, so hashes are the same in
+        every process:
+
+        >>> data = GameStateData()
+        >>> data.initialize(layout.get_layout('testClassic'), 1)
+        >>> data.get_zobrist_hash()
+        16615522813423603751
+        """
+        if self._zobrist_hash is None:
+            h = score_zobrist_key(self.score)
+            for index, agent_state in enumerate(self.agent_states):
+                h ^= agent_zobrist_key(index, agent_state)
+            for x, y in self.food.as_list():
+                h ^= cell_zobrist_key(_ZOBRIST_FOOD, (x, y))
+            for position in self.capsules:
+                h ^= cell_zobrist_key(_ZOBRIST_CAPSULE, position)
+            self._zobrist_hash = h
+        return self._zobrist_hash
+
+    def update_zobrist_hash(self, prev_state):
+        """
+        Brings the hash inherited from 'prev_state' up to date with the score
+        and the agent states this packet copied; the ones still shared did
+        not change. Food and capsules update it as they are removed.
+        """
+        if self._zobrist_hash is None:
+            return
+        if self.score != prev_state.score:
+            self._zobrist_hash ^= score_zobrist_key(prev_state.score) ^ score_zobrist_key(self.score)
+        for index in self._owned_agents:
+            self._zobrist_hash ^= agent_zobrist_key(index, prev_state.agent_states[index]) ^ \
+                agent_zobrist_key(index, self.agent_states[index])
+
     def __eq__(self, other):
         """
         Allows two states to be compared.
@@ -450,13 +783,7 @@ class GameStateData:
         """
         Allows states to be keys of dictionaries.
         """
-        for i, state in enumerate(self.agent_states):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                # hash(state)
-        return int((hash(tuple(self.agent_states)) + 13 * hash(self.food) + 113 * hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575)
+        return self.get_zobrist_hash()
 
     def __str__(self):
         width, height = self.layout.width, self.layout.height
@@ -516,7 +843,9 @@ class GameStateData:
         """
         Creates an initial game state from a layout array (see layout.py).
         """
-        self.food = layout.food.copy()
+        self.food = to_bit_grid(layout.food)
+        self.food_positions = frozenset(self.food.as_list())
+        self.num_food = len(self.food_positions)
         #self.capsules = []
         self.capsules = layout.capsules[:]
         self.layout = layout
@@ -534,6 +863,9 @@ class GameStateData:
             self.agent_states.append(AgentState(
                 Configuration(pos, Directions.STOP), isPacman))
         self._eaten = [False for a in self.agent_states]
+        self._owned_food = self._owned_capsules = True
+        self._owned_agents = set(range(len(self.agent_states)))
+        self._zobrist_hash = None
 
 
 try:
@@ -67,7 +67,7 @@ class ReflexAgent(Agent):
         to create a masterful evaluation function.
         """
         # Extract information from current game state
-        food_right_now = current_game_state.get_food().as_list()
+        food_right_now = current_game_state.get_food_positions()
         # Generate the successor state after taking the proposed action
         new_game_state = current_game_state.generate_pacman_successor(action)
         new_pos = new_game_state.get_pacman_position()
@@ -77,8 +77,7 @@ class ReflexAgent(Agent):
         min_distance = min(distances) + 0.00001 if distances else 0.00001  # Avoid division by zero
 
         # Calculate distance to closest food in NEW state (after action)
-        new_food = new_game_state.get_food()
-        new_food_coordinates = new_food.as_list() 
+        new_food_coordinates = new_game_state.get_food_positions()
         new_distances = [manhattan_distance(new_pos, x) for x in new_food_coordinates]
         new_min_distance = min(new_distances) - 0.01 if new_distances else -0.01 
 
@@ -43,6 +43,7 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import Configuration
 from util import nearest_point
 from util import manhattan_distance
 import util
@@ -58,6 +59,37 @@ import os
 ###################################################
 
 
+class ExploredTracker:
+    """
+    Counts the successors generated by GameState.generate_successor and, if
+    record_ids is set, the distinct states involved, by their 64-bit hash
+    (see GameStateData.get_zobrist_hash, which includes the score). Only the
+    hashes are kept, so tracking never keeps states alive.
+    """
+
+    def __init__(self, record_ids=True):
+        self.generated = 0
+        self.ids = set() if record_ids else None
+
+    def add(self, parent, child):
+        self.generated += 1
+        if self.ids is not None:
+            self.ids.add(parent.data.get_zobrist_hash())
+            self.ids.add(child.data.get_zobrist_hash())
+
+    def reset(self):
+        """
+        Starts counting over and returns the hashes recorded so far, or an
+        empty set if ids are not recorded.
+        """
+        ids = self.ids
+        self.generated = 0
+        if ids is None:
+            return set()
+        self.ids = set()
+        return ids
+
+
 class GameState:
     """
     A GameState specifies the full game state, including the food, capsules,
@@ -77,13 +109,33 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had get_legal_actions called
-    explored = set()
+    # static variable with the ExploredTracker told about every generated
+    # successor; None (the default) turns tracking off
+    explored_tracker = None
+
+    def set_explored_tracker(tracker):
+        """
+        Installs an ExploredTracker for every GameState, or removes it when
+        tracker is None, and returns the previous one.
+        """
+        previous = GameState.explored_tracker
+        GameState.explored_tracker = tracker
+        return previous
+    set_explored_tracker = staticmethod(set_explored_tracker)
 
     def get_and_reset_explored():
-        tmp = GameState.explored.copy()
-        GameState.explored = set()
-        return tmp
+        """
+        Returns the hashes of the distinct states that were a parent or a
+        child of generate_successor since the last call, and resets the
+        installed tracker. The first call turns tracking on, so it returns an
+        empty set; a tracker that only counts is kept as it is and also
+        returns an empty set.
+        """
+        tracker = GameState.explored_tracker
+        if tracker is None:
+            GameState.explored_tracker = ExploredTracker()
+            return set()
+        return tracker.reset()
     get_and_reset_explored = staticmethod(get_and_reset_explored)
 
     def get_legal_actions(self, agent_index=0):
@@ -102,12 +154,28 @@ class GameState:
     def generate_successor(self, agent_index, action):
         """
         Returns the successor state after the specified agent takes the action.
+
+        The successor shares its unchanged data with this state, which never
+        changes, whatever the successors do:
+
+        >>> state = GameState()
+        >>> state.initialize(layout.Layout(['%%%%%%', '%Po.G%', '%%%%%%']), 1)
+        >>> ate_capsule = state.generate_successor(0, Directions.EAST)
+        >>> ghost_moved = ate_capsule.generate_successor(1, Directions.WEST)
+        >>> ate_food = ate_capsule.generate_successor(0, Directions.EAST)
+        >>> state.get_capsules(), state.get_ghost_state(1).scared_timer, state.get_score()
+        ([(2, 1)], 0, 0.0)
+        >>> ate_capsule.get_ghost_position(1), ate_capsule.get_ghost_state(1).scared_timer
+        ((4, 1), 40)
+        >>> ate_capsule.has_food(3, 1), ate_food.has_food(3, 1)
+        (True, False)
         """
         # Check that successors exist
         if self.is_win() or self.is_lose():
             raise Exception('Can\'t generate a successor of a terminal state.')
 
-        # Copy current state
+        # Copy current state, with a hash the successor can update
+        self.data.get_zobrist_hash()
         state = GameState(self)
 
         # Let agent's logic deal with its action's effects on the board
@@ -121,7 +189,7 @@ class GameState:
         if agent_index == 0:
             state.data.score_change += -TIME_PENALTY  # Penalty for waiting around
         else:
-            GhostRules.decrement_timer(state.data.agent_states[agent_index])
+            GhostRules.decrement_timer(state.data.get_mutable_agent_state(agent_index))
 
         # Resolve multi-agent effects
         GhostRules.check_death(state, agent_index)
@@ -129,8 +197,9 @@ class GameState:
         # Bookkeeping
         state.data._agent_moved = agent_index
         state.data.score += state.data.score_change
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        state.data.update_zobrist_hash(self.data)
+        if GameState.explored_tracker is not None:
+            GameState.explored_tracker.add(self, state)
         return state
 
     def get_legal_pacman_actions(self):
@@ -183,7 +252,14 @@ class GameState:
         return self.data.capsules
 
     def get_num_food(self):
-        return self.data.food.count()
+        return self.data.num_food
+
+    def get_food_positions(self):
+        """
+        Returns the (x,y) positions of the remaining food as a frozenset,
+        without scanning the food grid like get_food().as_list().
+        """
+        return self.data.food_positions
 
     def get_food(self):
         """
@@ -359,7 +435,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacman_state = state.data.agent_states[0]
+        pacman_state = state.data.get_mutable_agent_state(0)
 
         # Update Configuration
         vector = Actions.direction_to_vector(action, PacmanRules.PACMAN_SPEED)
@@ -379,21 +455,18 @@ class PacmanRules:
         # Eat food
         if state.data.food[x][y]:
             state.data.score_change += 10
-            state.data.food = state.data.food.copy()
-            state.data.food[x][y] = False
+            state.data.remove_food(position)
             state.data._food_eaten = position
-            # TODO: cache num_food?
-            num_food = state.get_num_food()
-            if num_food == 0 and not state.data._lose:
+            if state.data.num_food == 0 and not state.data._lose:
                 state.data.score_change += 500
                 state.data._win = True
         # Eat capsule
         if position in state.get_capsules():
-            state.data.capsules.remove(position)
+            state.data.remove_capsule(position)
             state.data._capsule_eaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agent_states)):
-                state.data.agent_states[index].scared_timer = SCARED_TIME
+                state.data.get_mutable_agent_state(index).scared_timer = SCARED_TIME
     consume = staticmethod(consume)
 
 
@@ -425,7 +498,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghost_state = state.data.agent_states[ghost_index]
+        ghost_state = state.data.get_mutable_agent_state(ghost_index)
         speed = GhostRules.GHOST_SPEED
         if ghost_state.scared_timer > 0:
             speed /= 2.0
@@ -437,8 +510,10 @@ class GhostRules:
     def decrement_timer(ghost_state):
         timer = ghost_state.scared_timer
         if timer == 1:
-            ghost_state.configuration.pos = nearest_point(
-                ghost_state.configuration.pos)
+            # Configurations can be shared between states; replace, don't edit
+            configuration = ghost_state.configuration
+            ghost_state.configuration = Configuration(
+                nearest_point(configuration.pos), configuration.direction)
         ghost_state.scared_timer = max(0, timer - 1)
     decrement_timer = staticmethod(decrement_timer)
 
@@ -459,10 +534,12 @@ class GhostRules:
 
     def collide(state, ghost_state, agent_index):
         if ghost_state.scared_timer > 0:
+            ghost_state = state.data.get_mutable_agent_state(agent_index)
             state.data.score_change += 200
             GhostRules.place_ghost(state, ghost_state)
             ghost_state.scared_timer = 0
-            # Added for first-person
+            # Added for first-person; _eaten can be shared with the predecessor
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agent_index] = True
         else:
             if not state.data._win:
@@ -0,0 +1,484 @@
+# benchmark.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Benchmarks for the search infrastructure.
+
+Run from the search directory:
+
+> python benchmark.py
+
+The priority queue benchmark runs the same update()-driven A* loop with
+util.PriorityQueue and util.IndexedPriorityQueue on bigMaze, openMaze, a corners
+layout and on a food layout, and reports time, expansions and path cost for
+each queue.
+
+The search node benchmark runs breadth first search on bigMaze and uniform
+cost search on trickySearch, with search.SearchNode and with DictSearchNode,
+the node layout it had before using __slots__, and reports time, expansions
+per second and the peak memory traced by tracemalloc while searching.
+
+The distance field benchmark computes the distances from one cell to every
+cell of procedurally generated mazes, with breadth_first_search expanding one
+node at a time and with the level-at-a-time search of maze_distances.
+
+The sweep runs every layout of layouts/ with depth first, breadth first,
+uniform cost and A* search on the position, corners and food problems, A*
+once with every heuristic of the problem, and records time, expansions, path
+cost and peak traced memory of each run. It can write the results as JSON and
+compare them to a stored baseline:
+
+> python benchmark.py -s sweep --output sweep.json
+> python benchmark.py -s sweep --baseline sweep.json
+
+The command exits with status 1 if a run expands more nodes, finds a costlier
+path or stops completing. Times are too noisy for that by default; with
+--check-time, a run whose median time over the repeats is more than
+(1 + tolerance) times its baseline, and above half a second, also fails.
+"""
+
+import os
+import sys
+import statistics
+import json
+import time
+import random
+import optparse
+import tracemalloc
+import layout
+import pacman
+import util
+import search
+import search_agents
+import maze_distances
+from game import Grid, Actions
+
+def load_game_state(layout_name):
+    """Returns the initial GameState (pacman.py) of the given layout."""
+    board = layout.get_layout(layout_name)
+    if board is None: raise Exception("The layout " + layout_name + " cannot be found")
+    game_state = pacman.GameState()
+    game_state.initialize(board, 0)
+    return game_state
+
+def update_driven_search(problem, queue_class, heuristic=None):
+    """
+    A* over 'problem' that keys the frontier by state and relies on
+    queue_class.update() to lower the priority of a queued state, which is
+    the access pattern the priority queue benchmark stresses.
+
+    Returns the list of actions to the goal.
+    """
+    queue = queue_class()
+    start = problem.get_start_state()
+    found_costs = {start: 0}
+    parents = {start: None}
+    queue.push(start, 0)
+    while not queue.is_empty():
+        state = queue.pop()
+        if problem.is_goal_state(state):
+            actions = []
+            while parents[state] is not None:
+                state, action = parents[state]
+                actions.append(action)
+            actions.reverse()
+            return actions
+        for next_state, action, step_cost in problem.get_successors(state):
+            cost = found_costs[state] + step_cost
+            if next_state not in found_costs or cost < found_costs[next_state]:
+                found_costs[next_state] = cost
+                parents[next_state] = (state, action)
+                h = heuristic(next_state, problem) if heuristic is not None else 0
+                queue.update(next_state, cost + h)
+    return None
+
+# (name, layout, problem factory, heuristic). mediumCorners only has food in
+# its four corners, so the food problem on it is the corners problem.
+QUEUE_WORKLOADS = [
+    ('bigMaze', 'bigMaze',
+     lambda state: search_agents.PositionSearchProblem(state, warn=False, visualize=False), None),
+    ('openMaze', 'openMaze',
+     lambda state: search_agents.PositionSearchProblem(state, warn=False, visualize=False), None),
+    ('corners', 'mediumCorners', search_agents.FoodSearchProblem, None),
+    ('food', 'trickySearch', search_agents.FoodSearchProblem, None),
+]
+
+def benchmark_priority_queues(workloads=QUEUE_WORKLOADS, repeat=1):
+    """
+    Runs every workload with both priority queues and returns a list of
+    result dictionaries.
+    """
+    results = []
+    for name, layout_name, problem_factory, heuristic in workloads:
+        game_state = load_game_state(layout_name)
+        for queue_class in [util.PriorityQueue, util.IndexedPriorityQueue]:
+            best = None
+            for _ in range(repeat):
+                problem = problem_factory(game_state)
+                start_time = time.perf_counter()
+                actions = update_driven_search(problem, queue_class, heuristic)
+                elapsed = time.perf_counter() - start_time
+                if best is None or elapsed < best: best = elapsed
+            results.append({'workload': name,
+                            'layout': layout_name,
+                            'queue': queue_class.__name__,
+                            'seconds': best,
+                            'expanded': problem._expanded,
+                            'cost': problem.get_cost_of_actions(actions)})
+    return results
+
+# (name, layout, problem factory, search function)
+NODE_WORKLOADS = [
+    ('bigMaze', 'bigMaze',
+     lambda state: search_agents.PositionSearchProblem(state, warn=False, visualize=False), search.bfs),
+    ('trickySearch', 'trickySearch', search_agents.FoodSearchProblem, search.ucs),
+]
+
+class DictSearchNode:
+    """
+    The search node layout search.SearchNode had before it used __slots__:
+    fields in a per-instance __dict__ and the state behind a read-only
+    property. Kept so that the node benchmark can compare the two.
+    """
+    def __init__(self, parent, node_info):
+        self.__state = node_info[0]
+        self.action = node_info[1]
+        self.cost = node_info[2] if parent is None else node_info[2] + parent.cost
+        self.parent = parent
+
+    @property
+    def state(self):
+        return self.__state
+
+    get_path = search.SearchNode.get_path
+
+    def __eq__(self, other):
+        if type(other) is DictSearchNode:
+            return self.state == other.state
+        return False
+
+    def __hash__(self):
+        return hash(self.state)
+
+NODE_CLASSES = [DictSearchNode, search.SearchNode]
+
+def run_with_node_class(node_class, search_function, problem):
+    """Runs search_function with search.SearchNode replaced by node_class."""
+    original = search.SearchNode
+    search.SearchNode = node_class
+    try:
+        return search_function(problem)
+    finally:
+        search.SearchNode = original
+
+def benchmark_search_nodes(workloads=NODE_WORKLOADS, node_classes=NODE_CLASSES, repeat=1):
+    """
+    Runs every workload with every node class and returns a list of result
+    dictionaries with its fastest time, expansions per second and peak
+    traced memory. Memory is measured in a separate run, since tracing
+    slows the search down.
+    """
+    results = []
+    for name, layout_name, problem_factory, search_function in workloads:
+        game_state = load_game_state(layout_name)
+        for node_class in node_classes:
+            best = None
+            for _ in range(repeat):
+                problem = problem_factory(game_state)
+                start_time = time.perf_counter()
+                actions = run_with_node_class(node_class, search_function, problem)
+                elapsed = time.perf_counter() - start_time
+                if best is None or elapsed < best: best = elapsed
+
+            traced_problem = problem_factory(game_state)
+            tracemalloc.start()
+            run_with_node_class(node_class, search_function, traced_problem)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results.append({'workload': name,
+                            'search': search_function.__name__,
+                            'node': node_class.__name__,
+                            'seconds': best,
+                            'expanded': problem._expanded,
+                            'expanded_per_second': problem._expanded / best,
+                            'peak_kib': peak / 1024.0,
+                            'cost': problem.get_cost_of_actions(actions)})
+    return results
+
+def print_node_results(results):
+    print('%-13s %-22s %-15s %10s %10s %12s %10s %6s' % ('workload', 'search', 'node', 'seconds', 'expanded',
+                                                        'expanded/s', 'peak KiB', 'cost'))
+    for r in results:
+        print('%-13s %-22s %-15s %10.3f %10d %12.0f %10.0f %6d' % (r['workload'], r['search'], r['node'],
+                                                                  r['seconds'], r['expanded'],
+                                                                  r['expanded_per_second'], r['peak_kib'],
+                                                                  r['cost']))
+
+def generate_maze(width, height, seed=0, openings=0.05):
+    """
+    Returns the walls Grid of a random maze: a depth first spanning tree over
+    the cells with odd coordinates, with a fraction 'openings' of the
+    remaining inner walls between two open cells removed to create loops.
+    """
+    rand = random.Random(seed)
+    walls = Grid(width, height, True)
+    start = (1, 1)
+    walls[1][1] = False
+    stack = [start]
+    while stack:
+        x, y = stack[-1]
+        unvisited = [(x + dx, y + dy, dx, dy) for dx, dy in ((0, 2), (0, -2), (2, 0), (-2, 0))
+                     if 0 < x + dx < width - 1 and 0 < y + dy < height - 1 and walls[x + dx][y + dy]]
+        if not unvisited:
+            stack.pop()
+            continue
+        next_x, next_y, dx, dy = rand.choice(unvisited)
+        walls[x + dx // 2][y + dy // 2] = False
+        walls[next_x][next_y] = False
+        stack.append((next_x, next_y))
+    for x in range(1, width - 1):
+        for y in range(1, height - 1):
+            if walls[x][y] and rand.random() < openings and \
+                    ((not walls[x - 1][y] and not walls[x + 1][y]) or (not walls[x][y - 1] and not walls[x][y + 1])):
+                walls[x][y] = False
+    return walls
+
+def node_by_node_distances(walls, source):
+    """
+    Runs breadth_first_search from 'source' on a PositionSearchProblem whose
+    goal is never reached, so that it expands every connected cell, and
+    returns the number of expansions.
+    """
+    game_state = search_agents.CustomGameState(source, walls)
+    problem = search_agents.PositionSearchProblem(game_state, goal=(-1, -1), warn=False, visualize=False)
+    search.breadth_first_search(problem)
+    return problem._expanded
+
+def benchmark_distance_fields(size=500, mazes=3, repeat=1):
+    """
+    Times a single-source distance field on 'mazes' generated size x size
+    mazes with breadth_first_search and with maze_distances.distance_field,
+    and returns a list of result dictionaries. The neighbor table the search
+    problem uses and the cell graph of the fields are both built before
+    timing, as each is shared by all the searches of a layout.
+    """
+    results = []
+    for seed in range(mazes):
+        walls = generate_maze(size, size, seed)
+        Actions.get_neighbor_table(walls)
+        maze_distances.get_cell_graph(walls)
+        node_by_node_seconds = vectorized_seconds = None
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            expanded = node_by_node_distances(walls, (1, 1))
+            elapsed = time.perf_counter() - start_time
+            if node_by_node_seconds is None or elapsed < node_by_node_seconds: node_by_node_seconds = elapsed
+
+            start_time = time.perf_counter()
+            field = maze_distances.distance_field(walls, (1, 1))
+            elapsed = time.perf_counter() - start_time
+            if vectorized_seconds is None or elapsed < vectorized_seconds: vectorized_seconds = elapsed
+        results.append({'maze': '%dx%d-%d' % (size, size, seed),
+                        'cells': expanded,
+                        'numpy': maze_distances.numpy is not None,
+                        'bfs_seconds': node_by_node_seconds,
+                        'field_seconds': vectorized_seconds,
+                        'speedup': node_by_node_seconds / vectorized_seconds,
+                        'max_distance': max(field.distances)})
+    return results
+
+def print_field_results(results):
+    print('%-12s %8s %6s %12s %14s %8s %13s' % ('maze', 'cells', 'numpy', 'bfs seconds', 'field seconds',
+                                               'speedup', 'max distance'))
+    for r in results:
+        print('%-12s %8d %6s %12.3f %14.3f %8.1f %13d' % (r['maze'], r['cells'], r['numpy'], r['bfs_seconds'],
+                                                         r['field_seconds'], r['speedup'], r['max_distance']))
+
+def print_results(results):
+    print('%-10s %-14s %-22s %10s %10s %6s' % ('workload', 'layout', 'queue', 'seconds', 'expanded', 'cost'))
+    for r in results:
+        print('%-10s %-14s %-22s %10.3f %10d %6d' % (r['workload'], r['layout'], r['queue'],
+                                                     r['seconds'], r['expanded'], r['cost']))
+
+# (problem name, problem factory, heuristics A* is run with)
+SWEEP_PROBLEMS = [
+    ('PositionSearchProblem',
+     lambda state: search_agents.PositionSearchProblem(state, warn=False, visualize=False),
+     [search.null_heuristic, search_agents.manhattan_heuristic, search_agents.euclidean_heuristic]),
+    ('CornersProblem', search_agents.CornersProblem,
+     [search.null_heuristic, search_agents.corners_heuristic]),
+    ('FoodSearchProblem', search_agents.FoodSearchProblem,
+     [search.null_heuristic, search_agents.food_heuristic]),
+]
+
+SWEEP_SEARCHES = [search.dfs, search.bfs, search.ucs, search.astar]
+
+def get_layout_names(layout_directory='layouts'):
+    """Returns the names of the .lay files of 'layout_directory', sorted."""
+    return sorted(name[:-len('.lay')] for name in os.listdir(layout_directory) if name.endswith('.lay'))
+
+def run_search(problem_factory, game_state, search_function, heuristic, timeout, trace_memory=False):
+    """
+    Runs one search on a fresh problem, with the prints of the problem muted,
+    and returns a (status, actions, problem, seconds, peak bytes) tuple. The
+    status is 'ok', 'no path' when the search returns None, 'timeout' when it
+    runs for more than 'timeout' seconds and 'not implemented' when the
+    problem still calls util.raise_not_defined. The peak is None unless
+    'trace_memory' is set.
+    """
+    if heuristic is None: run = search_function
+    else: run = lambda problem: search_function(problem, heuristic)
+    run = util.TimeoutFunction(run, timeout)
+    status, actions, problem, peak = 'ok', None, None, None
+    util.mute_print()
+    if trace_memory: tracemalloc.start()
+    start_time = time.perf_counter()
+    try:
+        problem = problem_factory(game_state)
+        actions = run(problem)
+        if actions is None: status = 'no path'
+    except util.TimeoutFunctionException:
+        status = 'timeout'
+    except SystemExit:
+        status = 'not implemented'
+    finally:
+        elapsed = time.perf_counter() - start_time
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        util.unmute_print()
+    return status, actions, problem, elapsed, peak
+
+def sweep_key(result):
+    return '%s/%s/%s/%s' % (result['layout'], result['problem'], result['search'], result['heuristic'] or '-')
+
+def benchmark_sweep(layout_names=None, searches=SWEEP_SEARCHES, problems=SWEEP_PROBLEMS, timeout=10, repeat=1):
+    """
+    Runs every search function on every problem of every layout, A* once per
+    heuristic of the problem, and returns a list of result dictionaries with
+    the median time of 'repeat' runs. A run that times out or is not
+    implemented is recorded with its status and is not repeated. As in
+    benchmark_search_nodes, memory is measured in a separate run.
+    """
+    if layout_names is None: layout_names = get_layout_names()
+    results = []
+    for layout_name in layout_names:
+        game_state = load_game_state(layout_name)
+        for problem_name, problem_factory, heuristics in problems:
+            for search_function in searches:
+                if 'heuristic' in search_function.__code__.co_varnames: run_heuristics = heuristics
+                else: run_heuristics = [None]
+                for heuristic in run_heuristics:
+                    result = {'layout': layout_name,
+                              'problem': problem_name,
+                              'search': search_function.__name__,
+                              'heuristic': heuristic.__name__ if heuristic is not None else None,
+                              'status': None, 'seconds': None, 'expanded': None, 'cost': None, 'peak_kib': None}
+                    times = []
+                    for _ in range(repeat):
+                        status, actions, problem, elapsed, _ = run_search(problem_factory, game_state,
+                                                                          search_function, heuristic, timeout)
+                        result['status'] = status
+                        if status not in ('ok', 'no path'): break
+                        times.append(elapsed)
+                    if result['status'] in ('ok', 'no path'):
+                        result['seconds'] = statistics.median(times)
+                        result['expanded'] = problem._expanded
+                        if actions is not None: result['cost'] = problem.get_cost_of_actions(actions)
+                        _, _, _, _, peak = run_search(problem_factory, game_state, search_function,
+                                                      heuristic, timeout, trace_memory=True)
+                        result['peak_kib'] = peak / 1024.0
+                    results.append(result)
+    return results
+
+def compare_to_baseline(results, baseline, check_time=False, tolerance=1.0, min_seconds=0.5):
+    """
+    Returns a list of the regressions of 'results' against the results of an
+    earlier sweep: more expansions, a costlier path or a run that completed in
+    the baseline and no longer does. With check_time, a time above
+    (1 + tolerance) times the baseline is also a regression, unless it is
+    under min_seconds: shorter runs are too noisy to compare. Runs that are
+    not in the baseline are ignored.
+    """
+    baseline_results = dict((sweep_key(r), r) for r in baseline)
+    regressions = []
+    for result in results:
+        key = sweep_key(result)
+        if key not in baseline_results: continue
+        old = baseline_results[key]
+        if old['status'] in ('ok', 'no path') and result['status'] != old['status']:
+            regressions.append('%s: %s, was %s' % (key, result['status'], old['status']))
+            continue
+        if result['status'] not in ('ok', 'no path'): continue
+        if result['expanded'] > old['expanded']:
+            regressions.append('%s: %d nodes expanded, was %d' % (key, result['expanded'], old['expanded']))
+        if result['cost'] is not None and old['cost'] is not None and result['cost'] > old['cost']:
+            regressions.append('%s: path cost %d, was %d' % (key, result['cost'], old['cost']))
+        if check_time and result['seconds'] > max(old['seconds'] * (1 + tolerance), min_seconds):
+            regressions.append('%s: %.3f seconds, was %.3f' % (key, result['seconds'], old['seconds']))
+    return regressions
+
+def print_sweep_results(results):
+    print('%-18s %-21s %-22s %-20s %-15s %9s %9s %6s %10s' % ('layout', 'problem', 'search', 'heuristic', 'status',
+                                                            'seconds', 'expanded', 'cost', 'peak KiB'))
+    for r in results:
+        if r['status'] in ('ok', 'no path'):
+            numbers = '%9.3f %9d %6s %10.0f' % (r['seconds'], r['expanded'],
+                                               r['cost'] if r['cost'] is not None else '-', r['peak_kib'])
+        else:
+            numbers = '%9s %9s %6s %10s' % ('-', '-', '-', '-')
+        print('%-18s %-21s %-22s %-20s %-15s %s' % (r['layout'], r['problem'], r['search'], r['heuristic'] or '-',
+                                                    r['status'], numbers))
+
+if __name__ == '__main__':
+    parser = optparse.OptionParser(usage='python benchmark.py [options]')
+    parser.add_option('-r', '--repeat', type='int', dest='repeat', default=1,
+                      help='Number of runs per measurement; the fastest is reported, the median for the sweep')
+    parser.add_option('-s', '--suite', type='choice', choices=['all', 'queues', 'nodes', 'fields', 'sweep'],
+                      dest='suite', default='all',
+                      help='Benchmarks to run: all, queues, nodes, fields or sweep (default %default); '
+                           'all does not include the sweep')
+    parser.add_option('--maze-size', type='int', dest='maze_size', default=500,
+                      help='Width and height of the generated mazes of the fields benchmark')
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='Comma separated layouts of the sweep (default: every layout of layouts/)')
+    parser.add_option('-t', '--timeout', type='int', dest='timeout', default=10,
+                      help='Seconds before a run of the sweep is stopped (default %default)')
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='File to write the sweep results to, as JSON')
+    parser.add_option('-b', '--baseline', dest='baseline', default=None,
+                      help='JSON results of an earlier sweep; exit with status 1 on a regression')
+    parser.add_option('--check-time', action='store_true', dest='check_time', default=False,
+                      help='Also fail when a run of the sweep is slower than its baseline; use with -r 5 or more')
+    parser.add_option('--tolerance', type='float', dest='tolerance', default=1.0,
+                      help='Fraction a run may be slower than its baseline with --check-time (default %default)')
+    options, _ = parser.parse_args()
+    if options.suite in ('all', 'queues'):
+        print_results(benchmark_priority_queues(repeat=options.repeat))
+    if options.suite in ('all', 'nodes'):
+        print_node_results(benchmark_search_nodes(repeat=options.repeat))
+    if options.suite in ('all', 'fields'):
+        print_field_results(benchmark_distance_fields(options.maze_size, repeat=options.repeat))
+    if options.suite == 'sweep':
+        layout_names = options.layouts.split(',') if options.layouts else None
+        results = benchmark_sweep(layout_names, timeout=options.timeout, repeat=options.repeat)
+        print_sweep_results(results)
+        if options.output:
+            with open(options.output, 'w') as f: json.dump(results, f, indent=1)
+        if options.baseline:
+            with open(options.baseline) as f: baseline = json.load(f)
+            regressions = compare_to_baseline(results, baseline, options.check_time, options.tolerance)
+            for regression in regressions: print('Regression: ' + regression)
+            if regressions: sys.exit(1)
@@ -0,0 +1,190 @@
+# corridors.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Corridor contraction for position-based search problems.
+
+Most open cells of a maze have exactly two open neighbors, and a search that
+enters such a corridor can only walk on to its other end. A JunctionGraph
+keeps as nodes the cells where something can happen - junctions, dead ends
+and the cells a problem cares about (start, goals, food, corners) - and turns
+every corridor between two nodes into a single edge, so that searches expand
+nodes only. The junctions and dead ends of a layout are contracted once;
+each problem only splits the corridors its own cells lie on:
+
+  contracted = CorridorSearchProblem(problem)
+  path = search.a_star_search(contracted, contracted.wrap_heuristic(heuristic))
+  actions = expand_path(path)
+
+search.corridor_a_star_search does exactly this.
+"""
+
+import search
+from game import Actions
+
+class JunctionGraph:
+    """
+    The open cells of a layout contracted into a graph: 'nodes' are the cells
+    that don't have exactly two open neighbors, plus any cells a problem
+    asked to keep, and edges[node] lists the (next_node, actions, cells) of
+    the corridors leaving 'node', where 'actions' are the Directions and
+    'cells' the positions along the corridor, ending at next_node.
+
+    Build graphs with get_junction_graph, which contracts a layout once.
+    """
+
+    def __init__(self, neighbors, nodes, edges, corridor_ends=None):
+        self.neighbors = neighbors
+        self.nodes = nodes
+        self.edges = edges
+        # Corridor cell -> the two nodes at the ends of its corridor; only
+        # kept for the graph of a layout, where with_nodes needs it
+        self.corridor_ends = corridor_ends
+
+    def with_nodes(self, keep):
+        """
+        Returns the graph with the open cells of 'keep' as extra nodes. Only
+        the corridors that go through one of them are walked again: each is
+        split at the new nodes, and the edges of all other nodes are shared
+        with this graph.
+        """
+        new_nodes = set(cell for cell in keep if cell in self.neighbors and cell not in self.nodes)
+        if not new_nodes: return self
+        nodes = self.nodes | new_nodes
+        affected = set(new_nodes)
+        for cell in new_nodes:
+            # Cells of a loop without junctions have no ends; walking from the
+            # new nodes alone covers them
+            affected.update(self.corridor_ends.get(cell, ()))
+        edges = dict(self.edges)
+        for node in affected:
+            edges[node] = _walk_corridors(self.neighbors, nodes, node)
+        return JunctionGraph(self.neighbors, nodes, edges)
+
+def _walk_corridors(neighbors, nodes, node, corridor_ends=None):
+    # Follows every corridor leaving 'node' to the next node, recording the
+    # ends of the corridor of every cell passed in 'corridor_ends'
+    node_edges = []
+    for cell, action in neighbors[node]:
+        previous, actions, cells = node, [action], [cell]
+        while cell not in nodes:
+            # A corridor cell: go on through its other neighbor
+            for next_cell, next_action in neighbors[cell]:
+                if next_cell != previous: break
+            previous, cell = cell, next_cell
+            actions.append(next_action)
+            cells.append(cell)
+        if corridor_ends is not None:
+            for corridor_cell in cells[:-1]:
+                corridor_ends[corridor_cell] = (node, cell)
+        # A corridor that leads back to where it started never helps
+        if cell != node:
+            node_edges.append((cell, tuple(actions), tuple(cells)))
+    return node_edges
+
+def get_junction_graph(walls, keep=()):
+    """
+    Returns the JunctionGraph of a walls Grid with the cells of 'keep' as
+    extra nodes. The contraction of the layout itself is computed once and
+    cached on the Grid, like Actions.get_neighbor_table.
+    """
+    graph = getattr(walls, '_junction_graph', None)
+    if graph is None:
+        neighbors = Actions.get_neighbor_table(walls)
+        nodes = set(cell for cell, cell_neighbors in neighbors.items() if len(cell_neighbors) != 2)
+        corridor_ends = {}
+        edges = dict((node, _walk_corridors(neighbors, nodes, node, corridor_ends)) for node in nodes)
+        graph = JunctionGraph(neighbors, nodes, edges, corridor_ends)
+        walls._junction_graph = graph
+    return graph.with_nodes(keep)
+
+class CorridorSearchProblem(search.SearchProblem):
+    """
+    A search problem over the JunctionGraph of a position-based problem.
+
+    The wrapped problem must have 'walls', and its states must be positions
+    (x, y), as in PositionSearchProblem and AnyFoodSearchProblem, or
+    corners-style tuples (position, remaining) where 'remaining' is a tuple
+    of the positions still to visit. States of this problem have the same
+    form, and every action is the tuple of Directions of one corridor; see
+    expand_path.
+
+    The start, problem.goal, the cells of problem.food and problem.corners
+    are kept as nodes, along with the cells of 'keep', so that a goal can
+    only be reached at a node. Step costs are summed with problem.cost_fn
+    when the problem has one and are 1 per cell otherwise. Every expanded
+    node counts as an expansion of the wrapped problem.
+    """
+
+    def __init__(self, problem, keep=()):
+        self.problem = problem
+        self.start = problem.get_start_state()
+        self.has_remaining = not _is_position(self.start)
+        keep = set(keep)
+        keep.add(self._position(self.start))
+        if getattr(problem, 'goal', None) is not None: keep.add(problem.goal)
+        if getattr(problem, 'food', None) is not None: keep.update(problem.food.as_list())
+        if getattr(problem, 'corners', None) is not None: keep.update(problem.corners)
+        if self.has_remaining: keep.update(self.start[1])
+        self.graph = get_junction_graph(problem.walls, keep)
+        self.cost_fn = getattr(problem, 'cost_fn', None)
+        self._edge_costs = {}
+
+    def _position(self, state):
+        return state[0] if self.has_remaining else state
+
+    def get_start_state(self):
+        return self.start
+
+    def is_goal_state(self, state):
+        return self.problem.is_goal_state(state)
+
+    def get_successors(self, state):
+        position = self._position(state)
+        successors = []
+        for next_position, actions, cells in self.graph.edges[position]:
+            if self.has_remaining:
+                next_state = (next_position, tuple(cell for cell in state[1] if cell != next_position))
+            else:
+                next_state = next_position
+            successors.append((next_state, actions, self._get_edge_cost(cells)))
+
+        # Bookkeeping of the wrapped problem, as in its get_successors
+        problem = self.problem
+        if hasattr(problem, '_expanded'): problem._expanded += 1
+        if hasattr(problem, '_visited') and position not in problem._visited:
+            problem._visited[position] = True
+            problem._visited_list.append(position)
+        return successors
+
+    def _get_edge_cost(self, cells):
+        cost = self._edge_costs.get(cells)
+        if cost is None:
+            cost = sum(self.cost_fn(cell) for cell in cells) if self.cost_fn is not None else len(cells)
+            self._edge_costs[cells] = cost
+        return cost
+
+    def get_cost_of_actions(self, actions):
+        return self.problem.get_cost_of_actions(expand_path(actions))
+
+    def wrap_heuristic(self, heuristic):
+        """Returns 'heuristic' evaluated against the wrapped problem."""
+        return lambda state, problem=None: heuristic(state, self.problem)
+
+def _is_position(state):
+    return len(state) == 2 and isinstance(state[0], int) and isinstance(state[1], int)
+
+def expand_path(path):
+    """Flattens a path of corridor action tuples into single Directions."""
+    return [action for actions in path for action in actions]
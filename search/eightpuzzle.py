@@ -14,9 +14,32 @@
 
 import search
 import random
+import collections
+import optparse
+import util
 
 # Module Classes
 
+# Cell numbers are row * 3 + col; the tile in cell i is stored in bits 4i to 4i + 3
+# of a packed state
+_MOVE_OFFSETS = (('up', -1, 0), ('down', 1, 0), ('left', 0, -1), ('right', 0, 1))
+
+# Blank cell -> {move: cell the blank moves to}
+_MOVE_TABLE = [dict((move, (row + dr) * 3 + col + dc) for move, dr, dc in _MOVE_OFFSETS
+                    if 0 <= row + dr < 3 and 0 <= col + dc < 3)
+               for row in range(3) for col in range(3)]
+# Blank cell -> legal moves, in the order up, down, left, right
+_LEGAL_MOVES = [[move for move, _, _ in _MOVE_OFFSETS if move in _MOVE_TABLE[cell]] for cell in range(9)]
+
+def pack_numbers(numbers):
+    """Returns the packed state of a list of the nine numbers, cell by cell."""
+    packed = 0
+    for cell, number in enumerate(numbers):
+        packed |= number << (4 * cell)
+    return packed
+
+_GOAL = pack_numbers(range(9))
+
 class EightPuzzleState:
     """
     The Eight Puzzle is described in the course textbook on
@@ -25,7 +48,12 @@ class EightPuzzleState:
     This class defines the mechanics of the puzzle itself.  The
     task of recasting this puzzle as a search problem is left to
     the EightPuzzleSearchProblem class.
+
+    The puzzle is stored packed in one int, four bits per cell, along with
+    the cell of the blank, so moves, comparisons and hashing take a few
+    integer operations.
     """
+    __slots__ = ('packed', 'blank')
 
     def __init__( self, numbers ):
         """
@@ -46,18 +74,27 @@ class EightPuzzleState:
             | 6 | 7 | 8 |
             ------------
 
-        The configuration of the puzzle is stored in a 2-dimensional
+        The configuration of the puzzle can be read as a 2-dimensional
         list (a list of lists) 'cells'.
         """
-        self.cells = []
-        numbers = numbers[:] # Make a copy so as not to cause side-effects.
-        numbers.reverse()
-        for row in range( 3 ):
-            self.cells.append( [] )
-            for col in range( 3 ):
-                self.cells[row].append( numbers.pop() )
-                if self.cells[row][col] == 0:
-                    self.blankLocation = row, col
+        self.packed = pack_numbers(numbers)
+        self.blank = list(numbers).index(0)
+
+    @property
+    def cells(self):
+        """The configuration of the puzzle as a list of rows."""
+        packed = self.packed
+        return [[(packed >> (4 * (row * 3 + col))) & 0xF for col in range(3)] for row in range(3)]
+
+    @cells.setter
+    def cells(self, rows):
+        numbers = [number for row in rows for number in row]
+        self.packed = pack_numbers(numbers)
+        self.blank = numbers.index(0)
+
+    @property
+    def blankLocation(self):
+        return divmod(self.blank, 3)
 
     def is_goal(self):
         """
@@ -77,13 +114,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).is_goal()
         False
         """
-        current = 0
-        for row in range( 3 ):
-            for col in range( 3 ):
-                if current != self.cells[row][col]:
-                    return False
-                current += 1
-        return True
+        return self.packed == _GOAL
 
     def legal_moves(self):
         """
@@ -95,17 +126,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([0, 1, 2, 3, 4, 5, 6, 7, 8]).legal_moves()
         ['down', 'right']
         """
-        moves = []
-        row, col = self.blankLocation
-        if row != 0:
-            moves.append('up')
-        if row != 2:
-            moves.append('down')
-        if col != 0:
-            moves.append('left')
-        if col != 2:
-            moves.append('right')
-        return moves
+        return list(_LEGAL_MOVES[self.blank])
 
     def result(self, move):
         """
@@ -113,36 +134,21 @@ class EightPuzzleState:
         updated based on the provided move.
 
         The move should be a string drawn from a list returned by legal_moves.
-        Illegal moves will raise an exception, which may be an array bounds
-        exception.
+        Illegal moves will raise an exception.
 
         NOTE: This function *does not* change the current obj.  Instead,
         it returns a new obj.
         """
-        row, col = self.blankLocation
-        if move == 'up':
-            new_row = row - 1
-            new_col = col
-        elif move == 'down':
-            new_row = row + 1
-            new_col = col
-        elif move == 'left':
-            new_row = row
-            new_col = col - 1
-        elif move == 'right':
-            new_row = row
-            new_col = col + 1
-        else:
-            raise "Illegal Move"
-
-        # Create a copy of the current eightPuzzle
-        new_puzzle = EightPuzzleState([0, 0, 0, 0, 0, 0, 0, 0, 0])
-        new_puzzle.cells = [values[:] for values in self.cells]
-        # And update it to reflect the move
-        new_puzzle.cells[row][col] = self.cells[new_row][new_col]
-        new_puzzle.cells[new_row][new_col] = self.cells[row][col]
-        new_puzzle.blankLocation = new_row, new_col
-
+        try:
+            cell = _MOVE_TABLE[self.blank][move]
+        except KeyError:
+            raise Exception("Illegal Move")
+        # The tile of 'cell' slides into the blank, which holds a zero
+        shift = 4 * cell
+        tile = (self.packed >> shift) & 0xF
+        new_puzzle = EightPuzzleState.__new__(EightPuzzleState)
+        new_puzzle.packed = self.packed - (tile << shift) + (tile << (4 * self.blank))
+        new_puzzle.blank = cell
         return new_puzzle
 
     # Utilities for comparison and display
@@ -155,13 +161,10 @@ class EightPuzzleState:
               EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left')
           True
         """
-        for row in range( 3 ):
-            if self.cells[row] != other.cells[row]:
-                return False
-        return True
+        return self.packed == other.packed
 
     def __hash__(self):
-        return hash(str(self.cells))
+        return hash(self.packed)
 
     def __get_ascii_string(self):
         """
@@ -196,7 +199,7 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         self.puzzle = puzzle
 
     def get_start_state(self):
-        return puzzle
+        return self.puzzle
 
     def is_goal_state(self, state):
         return state.is_goal()
@@ -262,7 +265,135 @@ def create_random_eight_puzzle(moves=100):
         puzzle = puzzle.result(random.sample(puzzle.legal_moves(), 1)[0])
     return puzzle
 
+# Pattern databases
+
+# Disjoint groups of tiles: the moves of the tiles of one group are counted by
+# its database only, so the values of all the groups can be added up
+PATTERN_GROUPS = ((1, 2, 3, 4), (5, 6, 7, 8))
+
+# Stored for placements of the tiles that cannot be reached
+_NO_ENTRY = 0xFF
+_PDB_MAGIC = b'EPD1'
+
+# Cells next to every cell of the board, numbered row * 3 + col
+_ADJACENT_CELLS = [[r * 3 + c for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                    if 0 <= r < 3 and 0 <= c < 3]
+                   for row in range(3) for col in range(3)]
+
+_PATTERN_DATABASES = {}
+
+def pattern_index(cells):
+    """
+    Returns the index of a database entry: the cells of the tiles of its
+    group, in the order of the group, as the digits of a base 9 number.
+    """
+    index = 0
+    for cell in cells:
+        index = index * 9 + cell
+    return index
+
+def build_pattern_database(tiles):
+    """
+    Returns a bytearray with, for every placement of 'tiles', the fewest
+    moves of those tiles needed to bring them to their goal cells, whatever
+    the other tiles do. Entries are indexed by pattern_index.
+
+    The database is built with a breadth first search backwards from the goal
+    over the cells of 'tiles' and of the blank, where moving the blank into a
+    cell of another tile is free.
+    """
+    table = bytearray([_NO_ENTRY]) * (9 ** len(tiles))
+    # (blank cell, cells of the tiles) -> moves of the tiles
+    start = (0,) + tuple(tiles)
+    distances = {start: 0}
+    queue = collections.deque([start])
+    while queue:
+        state = queue.popleft()
+        distance = distances[state]
+        blank, cells = state[0], state[1:]
+        index = pattern_index(cells)
+        if distance < table[index]: table[index] = distance
+        for next_blank in _ADJACENT_CELLS[blank]:
+            if next_blank in cells:
+                # A tile of the group slides into the blank: one move
+                next_state = (next_blank,) + tuple(blank if cell == next_blank else cell for cell in cells)
+                next_distance = distance + 1
+            else:
+                next_state = (next_blank,) + cells
+                next_distance = distance
+            if next_state not in distances or next_distance < distances[next_state]:
+                distances[next_state] = next_distance
+                # Free moves go first, so the queue stays ordered by distance
+                if next_distance == distance: queue.appendleft(next_state)
+                else: queue.append(next_state)
+    return table
+
+def get_pattern_database_path(tiles):
+    return util.get_cache_path('eightpuzzle_pdb_%s.bin' % '-'.join(str(tile) for tile in tiles))
+
+def write_pattern_database(tiles, table):
+    """Stores a database in the on-disk cache and returns its path."""
+    path = get_pattern_database_path(tiles)
+    util.write_cache_file(path, [_PDB_MAGIC + bytes([len(tiles)]) + bytes(tiles), table])
+    return path
+
+def read_pattern_database(tiles):
+    """Returns the database of 'tiles' from the on-disk cache, or None."""
+    header = _PDB_MAGIC + bytes([len(tiles)]) + bytes(tiles)
+    try:
+        with open(get_pattern_database_path(tiles), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if data[:len(header)] != header or len(data) != len(header) + 9 ** len(tiles):
+        return None
+    return bytearray(data[len(header):])
+
+def get_pattern_databases(groups=PATTERN_GROUPS):
+    """
+    Returns a list of (tiles, table) pairs for 'groups', read from the
+    on-disk cache, or built and stored there the first time.
+    """
+    if groups not in _PATTERN_DATABASES:
+        databases = []
+        for tiles in groups:
+            table = read_pattern_database(tiles)
+            if table is None:
+                table = build_pattern_database(tiles)
+                write_pattern_database(tiles, table)
+            databases.append((tiles, table))
+        _PATTERN_DATABASES[groups] = databases
+    return _PATTERN_DATABASES[groups]
+
+def pattern_database_heuristic(state, problem=None):
+    """
+    The sum of the disjoint pattern database values of an EightPuzzleState:
+    admissible and consistent, and at least as large as the sum of the
+    Manhattan distances of the tiles.
+    """
+    cell_of = [0] * 9
+    packed = state.packed
+    for cell in range(9):
+        cell_of[(packed >> (4 * cell)) & 0xF] = cell
+    total = 0
+    for tiles, table in get_pattern_databases():
+        index = 0
+        for tile in tiles:
+            index = index * 9 + cell_of[tile]
+        total += table[index]
+    return total
+
 if __name__ == '__main__':
+    parser = optparse.OptionParser(usage='python eightpuzzle.py [options]')
+    parser.add_option('-b', '--build-pdb', action='store_true', dest='build_pdb', default=False,
+                      help='Build the pattern databases of PATTERN_GROUPS into the on-disk cache and exit')
+    options, _ = parser.parse_args()
+    if options.build_pdb:
+        for tiles in PATTERN_GROUPS:
+            path = write_pattern_database(tiles, build_pattern_database(tiles))
+            print('Pattern database for tiles %s written to %s' % (str(tiles), path))
+        raise SystemExit(0)
+
     puzzle = create_random_eight_puzzle(25)
     print('A random puzzle:')
     print(puzzle)
@@ -274,6 +274,140 @@ class Grid:
                 bools.append(False)
         return bools
 
+class BitGrid(Grid):
+    """
+    A Grid of booleans stored as the bits of one Python int, for the food of
+    a game state.
+
+    Cell (x, y) is bit x * height + y, the same numbering Grid.__hash__ uses,
+    so a BitGrid hashes like the equal Grid. grid[x] returns a lightweight
+    view of column x, so grid[x][y] reads and writes work as with a Grid.
+    The number of True cells and the hash are cached, and copies share the
+    int, so copy(), count() and hashing are O(1).
+    """
+    def __init__(self, width, height, initial_value=False, bits=0):
+        if initial_value not in [False, True]: raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        if initial_value: bits = (1 << (width * height)) - 1
+        self.bits = bits
+        self._count = bin(bits).count('1')
+        self._hash = None
+
+    @property
+    def data(self):
+        """The cells as a new list of columns, as in Grid.data."""
+        return [list(self[x]) for x in range(self.width)]
+
+    def __str__(self):
+        # Reads the bits directly; the data property rebuilds every column
+        mask = (1 << self.height) - 1
+        columns = [(self.bits >> (x * self.height)) & mask for x in range(self.width)]
+        out = [['T' if (column >> y) & 1 else 'F' for column in columns] for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __getitem__(self, x):
+        if x < 0: x += self.width
+        if not 0 <= x < self.width: raise IndexError('grid column out of range')
+        return BitGridColumn(self, x)
+
+    def __setitem__(self, x, column):
+        for y, value in enumerate(column):
+            self.set(x, y, value)
+
+    def get(self, x, y):
+        return (self.bits >> (x * self.height + y)) & 1 == 1
+
+    def set(self, x, y, value):
+        bit = 1 << (x * self.height + y)
+        if value:
+            if not self.bits & bit:
+                self.bits |= bit
+                self._count += 1
+                self._hash = None
+        elif self.bits & bit:
+            self.bits ^= bit
+            self._count -= 1
+            self._hash = None
+
+    def __eq__(self, other):
+        if other is None: return False
+        if isinstance(other, BitGrid):
+            return self.bits == other.bits and self.width == other.width and self.height == other.height
+        return self.data == other.data
+
+    def __hash__(self):
+        if self._hash is None: self._hash = hash(self.bits)
+        return self._hash
+
+    def copy(self):
+        g = BitGrid(self.width, self.height)
+        g.bits = self.bits
+        g._count = self._count
+        g._hash = self._hash
+        return g
+
+    def deep_copy(self):
+        return self.copy()
+
+    def shallow_copy(self):
+        return self.copy()
+
+    def count(self, item =True ):
+        if item: return self._count
+        return self.width * self.height - self._count
+
+    def as_list(self, key = True):
+        bits = self.bits if key else ~self.bits & ((1 << (self.width * self.height)) - 1)
+        list_keys = []
+        while bits:
+            low_bit = bits & -bits
+            list_keys.append(divmod(low_bit.bit_length() - 1, self.height))
+            bits ^= low_bit
+        return list_keys
+
+class BitGridColumn:
+    """
+    Column x of a BitGrid, so that grid[x][y] reads and writes the grid.
+    """
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        height = self.grid.height
+        if y < 0: y += height
+        if not 0 <= y < height: raise IndexError('grid row out of range')
+        return self.grid.get(self.x, y)
+
+    def __setitem__(self, y, value):
+        if y < 0: y += self.grid.height
+        self.grid.set(self.x, y, value)
+
+    def __len__(self):
+        return self.grid.height
+
+    def __iter__(self):
+        column = self.grid.bits >> (self.x * self.grid.height)
+        for y in range(self.grid.height):
+            yield (column >> y) & 1 == 1
+
+    def count(self, item =True ):
+        return sum(1 for value in self if value == item)
+
+def to_bit_grid(grid):
+    """Returns a BitGrid with the same cells as a Grid."""
+    bits = 0
+    for x in range(grid.width):
+        for y in range(grid.height):
+            if grid[x][y]: bits |= 1 << (x * grid.height + y)
+    return BitGrid(grid.width, grid.height, bits=bits)
+
 def reconstitute_grid(bit_rep):
     if type(bit_rep) is not type((1, 2)):
         return bit_rep
@@ -368,6 +502,33 @@ class Actions:
         return x + dx, y + dy
     get_successor = staticmethod(get_successor)
 
+    def get_neighbor_table(walls):
+        """
+        Returns a dictionary from every open cell of a walls Grid to a tuple of
+        its (neighbor, action) pairs, in the order North, South, East, West.
+
+        The table is built the first time it is asked for and cached on the
+        walls object, so all the search problems of a layout share it. Walls
+        must not change once their table is built.
+        """
+        table = getattr(walls, '_neighbor_table', None)
+        if table is None:
+            table = {}
+            for x in range(walls.width):
+                for y in range(walls.height):
+                    if walls[x][y]: continue
+                    neighbors = []
+                    for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                        dx, dy = Actions._directions[direction]
+                        next_x, next_y = x + dx, y + dy
+                        if 0 <= next_x < walls.width and 0 <= next_y < walls.height \
+                                and not walls[next_x][next_y]:
+                            neighbors.append(((next_x, next_y), direction))
+                    table[(x, y)] = tuple(neighbors)
+            walls._neighbor_table = table
+        return table
+    get_neighbor_table = staticmethod(get_neighbor_table)
+
 class GameStateData:
     """
 
@@ -488,7 +649,7 @@ class GameStateData:
         """
         Creates an initial game state from a layout array (see layout.py).
         """
-        self.food = layout.food.copy()
+        self.food = to_bit_grid(layout.food)
         #self.capsules = []
         self.capsules = layout.capsules[:]
         self.layout = layout
@@ -0,0 +1,226 @@
+# incremental_search.py
+# ---------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Incremental replanning over the cells of a layout with D* Lite.
+
+A planner keeps its search between queries, so an agent that asks for a path
+every turn while Pacman moves, food is eaten or cells become blocked only
+pays for the part of the maze the change affects:
+
+  planner = DStarLite(walls, pacman_position, food.as_list())
+  planner.get_next_action()
+  planner.move_start(new_position)
+  planner.remove_goal(eaten_food)
+  planner.set_cell_cost(ghost_position, float('inf'))
+  planner.get_next_action()
+
+The search runs backwards from the goals: g[cell] is the cost of the
+cheapest path from the cell to any goal, and rhs[cell] is its one step
+lookahead, the cheapest cost of entering a neighbor plus the neighbor's g
+value (0 for a goal). A cell is locally inconsistent while the two differ,
+and only inconsistent cells are queued, ordered by their cost plus the
+Manhattan distance from the start. Moving the start does not re-key the
+queue; the key modifier km grows by the distance moved instead, as in
+Koenig and Likhachev's D* Lite.
+"""
+
+import util
+from game import Actions, Directions
+
+INFINITY = float('inf')
+
+class DStarLite:
+    """
+    A D* Lite planner from a start cell to the nearest of a set of goal cells.
+
+    The cost of a move is the cost of the cell it enters: 1 unless changed
+    with set_cell_cost, which accepts any cost of at least 1 (so that the
+    Manhattan distance stays admissible) or infinity to block the cell.
+    Walls are never entered.
+    """
+
+    def __init__(self, walls, start, goals=()):
+        self.neighbors = Actions.get_neighbor_table(walls)
+        self.start = start
+        self.last_start = start
+        self.goals = set()
+        self.costs = {}
+        self.g = {}
+        self.rhs = {}
+        self.km = 0
+        self.queue = util.IndexedPriorityQueue()
+        self._expanded = 0 # Number of cells expanded by all the queries so far
+        for goal in goals: self.add_goal(goal)
+
+    def get_cell_cost(self, cell):
+        return self.costs.get(cell, 1)
+
+    def calculate_key(self, cell):
+        value = min(self.g.get(cell, INFINITY), self.rhs.get(cell, INFINITY))
+        return (value + util.manhattan_distance(self.start, cell) + self.km, value)
+
+    def update_cell(self, cell):
+        """
+        Recomputes the rhs value of a cell from its neighbors and queues the
+        cell if, and only if, it is now locally inconsistent.
+        """
+        if cell in self.goals:
+            rhs = 0
+        else:
+            rhs = INFINITY
+            for neighbor, _ in self.neighbors[cell]:
+                cost = self.get_cell_cost(neighbor) + self.g.get(neighbor, INFINITY)
+                if cost < rhs: rhs = cost
+        if rhs == INFINITY: self.rhs.pop(cell, None)
+        else: self.rhs[cell] = rhs
+        if self.g.get(cell, INFINITY) != rhs:
+            self.queue.set_priority(cell, self.calculate_key(cell))
+        elif cell in self.queue:
+            self.queue.remove(cell)
+
+    def compute_shortest_path(self):
+        """
+        Expands inconsistent cells until the lookahead of the start is settled
+        and no queued cell could still lower its cost.
+        """
+        queue, g, rhs, start = self.queue, self.g, self.rhs, self.start
+        while not queue.is_empty():
+            cell, old_key = queue.peek()
+            start_key = self.calculate_key(start)
+            if old_key >= start_key and rhs.get(start, INFINITY) <= g.get(start, INFINITY): break
+            new_key = self.calculate_key(cell)
+            if old_key < new_key:
+                # Queued before the start moved; its key was too low
+                queue.set_priority(cell, new_key)
+                continue
+            queue.pop()
+            self._expanded += 1
+            if g.get(cell, INFINITY) > rhs.get(cell, INFINITY):
+                # Overconsistent: the cell got cheaper, settle it
+                g[cell] = rhs[cell]
+                for neighbor, _ in self.neighbors[cell]:
+                    self.update_cell(neighbor)
+            else:
+                # Underconsistent: the cell got more expensive, raise it and
+                # let it and its neighbors find their new costs
+                g.pop(cell, None)
+                self.update_cell(cell)
+                for neighbor, _ in self.neighbors[cell]:
+                    self.update_cell(neighbor)
+
+    def move_start(self, position):
+        """Moves the start, e.g. after Pacman takes a step."""
+        if position == self.start: return
+        self.km += util.manhattan_distance(self.last_start, position)
+        self.last_start = self.start = position
+
+    def add_goal(self, goal):
+        if goal in self.goals: return
+        self.goals.add(goal)
+        self.update_cell(goal)
+
+    def remove_goal(self, goal):
+        if goal not in self.goals: return
+        self.goals.discard(goal)
+        self.update_cell(goal)
+
+    def set_goals(self, goals):
+        """Replaces the goals, repairing only the goals that changed."""
+        goals = set(goals)
+        for goal in self.goals - goals: self.remove_goal(goal)
+        for goal in goals - self.goals: self.add_goal(goal)
+
+    def set_cell_cost(self, cell, cost):
+        """
+        Sets the cost of entering an open cell; float('inf') blocks it.
+        """
+        if cost < 1: raise Exception('Cell costs must be at least 1, not ' + str(cost))
+        if cost == self.get_cell_cost(cell): return
+        if cost == 1: del self.costs[cell]
+        else: self.costs[cell] = cost
+        # Only the moves into the cell changed
+        for neighbor, _ in self.neighbors[cell]:
+            self.update_cell(neighbor)
+
+    def get_distance(self):
+        """
+        Returns the cost of the cheapest path from the start to a goal, or
+        infinity if no goal can be reached.
+
+        The repaired distance matches Dijkstra's algorithm run from scratch
+        while the start, the goals and the cell costs change at random:
+
+        >>> import random, layout
+        >>> walls = layout.get_layout('mediumMaze').walls
+        >>> cells = sorted(Actions.get_neighbor_table(walls))
+        >>> def dijkstra(planner):
+        ...     distances = dict((goal, 0) for goal in planner.goals)
+        ...     queue = util.PriorityQueue()
+        ...     for goal in planner.goals: queue.push(goal, 0)
+        ...     while not queue.is_empty():
+        ...         cell = queue.pop()
+        ...         for neighbor, _ in planner.neighbors[cell]:
+        ...             cost = distances[cell] + planner.get_cell_cost(cell)
+        ...             if cost < distances.get(neighbor, INFINITY):
+        ...                 distances[neighbor] = cost
+        ...                 queue.update(neighbor, cost)
+        ...     return distances.get(planner.start, INFINITY)
+        >>> random.seed(0)
+        >>> planner = DStarLite(walls, cells[0], random.sample(cells, 3))
+        >>> failures = []
+        >>> for step in range(300):
+        ...     change = random.random()
+        ...     if change < 0.3: planner.move_start(random.choice(cells))
+        ...     elif change < 0.45: planner.add_goal(random.choice(cells))
+        ...     elif change < 0.6: planner.remove_goal(random.choice(sorted(planner.goals)))
+        ...     else: planner.set_cell_cost(random.choice(cells), random.choice([1, 2, 5, INFINITY]))
+        ...     if planner.get_distance() != dijkstra(planner):
+        ...         failures.append((step, planner.start, sorted(planner.goals), sorted(planner.costs.items())))
+        >>> failures
+        []
+        """
+        self.compute_shortest_path()
+        # The search stops once the start's lookahead is settled, possibly
+        # before the start itself is expanded
+        return self.rhs.get(self.start, INFINITY)
+
+    def get_path(self):
+        """
+        Returns the actions of a cheapest path from the start to a goal, or
+        None if no goal can be reached.
+        """
+        if self.get_distance() == INFINITY: return None
+        actions = []
+        cell = self.start
+        while cell not in self.goals:
+            best, best_cost = None, INFINITY
+            for neighbor, action in self.neighbors[cell]:
+                cost = self.get_cell_cost(neighbor) + self.g.get(neighbor, INFINITY)
+                if cost < best_cost: best, best_cost = (neighbor, action), cost
+            cell, action = best
+            actions.append(action)
+        return actions
+
+    def get_next_action(self):
+        """
+        Returns the first action of a cheapest path from the start to a goal,
+        or Directions.STOP if the start is a goal or no goal can be reached.
+        """
+        if self.start in self.goals or self.get_distance() == INFINITY: return Directions.STOP
+        best, best_cost = Directions.STOP, INFINITY
+        for neighbor, action in self.neighbors[self.start]:
+            cost = self.get_cell_cost(neighbor) + self.g.get(neighbor, INFINITY)
+            if cost < best_cost: best, best_cost = action, cost
+        return best
@@ -0,0 +1,378 @@
+# maze_distances.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A per-layout maze distance oracle.
+
+The distances between every pair of open cells of a layout are computed once,
+with one breadth first search per open cell, and stored as a uint16 matrix in
+a file of the on-disk cache (see util.get_cache_path) named after a hash of
+Layout.layout_text. The file is memory-mapped, so repeated runs and worker
+processes share the same table instead of recomputing it, and every lookup is
+O(1):
+
+  distances = get_maze_distances(game_state)
+  distances.get_distance((1, 1), (5, 3))
+
+The module also computes distance fields, the maze distances from one or
+more source cells to every open cell, with a breadth first search that
+expands a whole level at a time:
+
+  field = multi_source_distance_field(walls, food.as_list())
+  field.get_distance((1, 1))
+
+With NumPy installed, the frontier of every level is an index array expanded
+at once against a matrix with the neighbors of every cell, and all-pairs
+tables are built for all sources at the same time. Without NumPy the same
+level-synchronous search runs over Python lists.
+"""
+
+import array
+import collections
+import hashlib
+import heapq
+import mmap
+import os
+import util
+from game import Actions
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Stored for pairs of cells that are not connected
+UNREACHABLE = 0xFFFF
+
+_MAGIC = b'PMD1'
+_HEADER_SIZE = 8
+
+# Oracles already loaded by this process, by layout hash
+_ORACLES = {}
+_last_layout = None
+_last_oracle = None
+
+class MazeDistances:
+    """
+    All-pairs maze distances of a layout, backed by a memory-mapped uint16
+    matrix. Open cells are numbered in column-major order (x, then y), and the
+    distance between cells i and j is stored at position i * size + j.
+    """
+
+    def __init__(self, walls, path):
+        self.walls = walls
+        self.cells = open_cells(walls)
+        self.cell_index = dict((cell, i) for i, cell in enumerate(self.cells))
+        self.size = len(self.cells)
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.table = memoryview(self._map)[_HEADER_SIZE:].cast('H')
+
+    def get_distance(self, point1, point2):
+        """
+        Returns the maze distance between two open cells, or infinity if they
+        are not connected.
+        """
+        index = self.cell_index
+        distance = self.table[index[point1] * self.size + index[point2]]
+        if distance == UNREACHABLE: return float('inf')
+        return distance
+
+    def get_distances_from(self, point):
+        """
+        Returns a dictionary with the maze distance from 'point' to every open
+        cell connected to it.
+        """
+        start = self.cell_index[point] * self.size
+        row = self.table[start:start + self.size]
+        return dict((cell, row[i]) for i, cell in enumerate(self.cells) if row[i] != UNREACHABLE)
+
+def get_maze_distances(board):
+    """
+    Returns the MazeDistances of a layout, building and caching the table on
+    disk the first time the layout is seen.
+
+    board: a Layout (layout.py) or a GameState (pacman.py)
+    """
+    global _last_layout, _last_oracle
+    if hasattr(board, 'data'): board = board.data.layout
+    # Most callers ask over and over for the same layout object
+    if board is _last_layout: return _last_oracle
+
+    key = layout_key(board.layout_text)
+    oracle = _ORACLES.get(key)
+    if oracle is None:
+        path = util.get_cache_path('maze_distances_%s.bin' % key)
+        if not _is_valid_table(path, board.walls):
+            _write_table(path, board.walls)
+        oracle = MazeDistances(board.walls, path)
+        _ORACLES[key] = oracle
+    _last_layout, _last_oracle = board, oracle
+    return oracle
+
+def layout_key(layout_text):
+    """Returns a hash that identifies the layout given by its text lines."""
+    return hashlib.sha1('\n'.join(layout_text).encode('utf-8')).hexdigest()
+
+def open_cells(walls):
+    """Returns the open cells of a wall Grid in column-major order."""
+    return [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+
+def _neighbor_indices(cells, cell_index):
+    neighbors = []
+    for x, y in cells:
+        neighbors.append([cell_index[n] for n in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y))
+                          if n in cell_index])
+    return neighbors
+
+def _neighbor_matrix(walls, size):
+    """
+    Returns a (size x 4) NumPy matrix with the indices of the north, south,
+    east and west neighbors of every open cell, where 'size' stands for a wall.
+    """
+    is_open = ~numpy.array(walls.data, dtype=bool)
+    # Pad the layout with walls so that border cells need no special case
+    index = numpy.full((walls.width + 2, walls.height + 2), size, dtype=numpy.int64)
+    index[1:-1, 1:-1][is_open] = numpy.arange(size)
+    # nonzero() walks x, then y: the column-major order of open_cells
+    xs, ys = numpy.nonzero(is_open)
+    xs, ys = xs + 1, ys + 1
+    return numpy.stack([index[xs, ys + 1], index[xs, ys - 1], index[xs + 1, ys], index[xs - 1, ys]], axis=1)
+
+class CellGraph:
+    """
+    The open cells of a walls Grid, numbered in column-major order as in
+    open_cells, and the neighbors of every cell: a NumPy matrix (see
+    _neighbor_matrix) when NumPy is available and lists of indices otherwise.
+    """
+
+    def __init__(self, walls):
+        self.cells = open_cells(walls)
+        self.cell_index = dict((cell, i) for i, cell in enumerate(self.cells))
+        self.size = len(self.cells)
+        if numpy is not None:
+            self.neighbors = _neighbor_matrix(walls, self.size)
+        else:
+            self.neighbors = _neighbor_indices(self.cells, self.cell_index)
+
+    def get_distances(self, sources):
+        """
+        Returns the distance from the nearest of the cell indices 'sources' to
+        every cell, -1 for the cells none of them reaches, as a NumPy array or
+        a list.
+        """
+        if numpy is not None:
+            return _numpy_distances(self.neighbors, self.size, sources)
+        return _python_distances(self.neighbors, self.size, sources)
+
+def _numpy_distances(neighbors, size, sources):
+    # The padding index 'size' counts as reached, so walls are never expanded
+    distances = numpy.full(size + 1, -1, dtype=numpy.int64)
+    distances[size] = 0
+    frontier = numpy.unique(numpy.asarray(sources, dtype=numpy.int64))
+    distances[frontier] = 0
+    distance = 0
+    while frontier.size:
+        distance += 1
+        candidates = neighbors[frontier].ravel()
+        frontier = numpy.unique(candidates[distances[candidates] < 0])
+        distances[frontier] = distance
+    return distances[:size]
+
+def _python_distances(neighbors, size, sources):
+    distances = [-1] * size
+    frontier = []
+    for source in sources:
+        if distances[source] < 0:
+            distances[source] = 0
+            frontier.append(source)
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for cell in frontier:
+            for neighbor in neighbors[cell]:
+                if distances[neighbor] < 0:
+                    distances[neighbor] = distance
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances
+
+def get_cell_graph(walls):
+    """Returns the CellGraph of a walls Grid, cached on the Grid."""
+    graph = getattr(walls, '_cell_graph', None)
+    if graph is None:
+        graph = CellGraph(walls)
+        walls._cell_graph = graph
+    return graph
+
+class DistanceField:
+    """
+    Maze distances from a set of source cells to every open cell of a
+    layout. 'distances' follows the cell order of 'graph' (a CellGraph) and
+    holds -1 for the cells that no source reaches.
+    """
+
+    def __init__(self, graph, distances):
+        self.graph = graph
+        self.distances = distances
+
+    def get_distance(self, point):
+        """
+        Returns the maze distance from the nearest source to an open cell, or
+        infinity if no source reaches it.
+        """
+        distance = self.distances[self.graph.cell_index[point]]
+        if distance < 0: return float('inf')
+        return int(distance)
+
+    def get_reachable_cells(self):
+        """Returns the open cells reached from the sources."""
+        cells = self.graph.cells
+        if numpy is not None:
+            return [cells[i] for i in numpy.flatnonzero(self.distances >= 0)]
+        return [cell for cell, distance in zip(cells, self.distances) if distance >= 0]
+
+def multi_source_distance_field(walls, sources):
+    """
+    Returns the DistanceField of the distances from the nearest of the open
+    cells 'sources' to every open cell of 'walls'.
+    """
+    graph = get_cell_graph(walls)
+    return DistanceField(graph, graph.get_distances([graph.cell_index[source] for source in sources]))
+
+def distance_field(walls, source):
+    """Returns the DistanceField of the distances from one open cell."""
+    return multi_source_distance_field(walls, [source])
+
+def reachable_cells(walls, source):
+    """Returns the open cells of 'walls' connected to 'source'."""
+    return distance_field(walls, source).get_reachable_cells()
+
+class DynamicDistanceField:
+    """
+    A multi-source distance field whose sources can be removed one at a time.
+
+    Removing a source only repairs the cells whose distance came from it:
+    the cells left without a neighbor one step closer to a source are reset,
+    in breadth first order from the removed source, and then filled again
+    outwards from the cells around them that kept their distance. The cost
+    depends on the size of that region, not on the size of the layout.
+    """
+
+    def __init__(self, walls, sources):
+        self.neighbors = Actions.get_neighbor_table(walls)
+        self.sources = set(sources)
+        field = multi_source_distance_field(walls, self.sources)
+        self.distances = dict((cell, int(distance)) for cell, distance in zip(field.graph.cells, field.distances)
+                              if distance >= 0)
+
+    def get_distance(self, point):
+        """
+        Returns the maze distance from an open cell to the nearest source, or
+        infinity if no source reaches it.
+        """
+        return self.distances.get(point, float('inf'))
+
+    def remove_source(self, source):
+        if source not in self.sources: return
+        self.sources.discard(source)
+        neighbors, distances = self.neighbors, self.distances
+
+        # Reset every cell that has no neighbor one step closer left. Cells are
+        # visited by increasing distance, so the neighbors a cell depends on
+        # are settled by the time it is checked.
+        reset = {source}
+        queue = collections.deque([source])
+        while queue:
+            cell = queue.popleft()
+            distance = distances[cell] + 1
+            for neighbor, _ in neighbors[cell]:
+                if neighbor in reset or neighbor in self.sources or distances.get(neighbor) != distance:
+                    continue
+                if not any(distances.get(other) == distance - 1 and other not in reset
+                           for other, _ in neighbors[neighbor]):
+                    reset.add(neighbor)
+                    queue.append(neighbor)
+        for cell in reset:
+            del distances[cell]
+
+        # Fill the reset cells again from the cells around them, nearest first
+        frontier = []
+        for cell in reset:
+            for neighbor, _ in neighbors[cell]:
+                if neighbor in distances:
+                    heapq.heappush(frontier, (distances[neighbor], neighbor))
+        while frontier:
+            distance, cell = heapq.heappop(frontier)
+            if distance > distances[cell]: continue
+            for neighbor, _ in neighbors[cell]:
+                if neighbor in reset and distance + 1 < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = distance + 1
+                    heapq.heappush(frontier, (distance + 1, neighbor))
+
+def _numpy_table(neighbors, size):
+    # Runs the breadth first searches of all the sources at the same time:
+    # column i of the boolean matrices is the search from cell i, so that a
+    # level gathers whole rows. Maze distances are symmetric, so the result is
+    # also the table by source rows. The padding row 'size' is never in a
+    # frontier, so walls are never reached.
+    table = numpy.full((size, size), UNREACHABLE, dtype=numpy.uint16)
+    numpy.fill_diagonal(table, 0)
+    reached = numpy.zeros((size + 1, size), dtype=bool)
+    numpy.fill_diagonal(reached, True)
+    frontier = reached.copy()
+    distance = 0
+    while frontier.any():
+        distance += 1
+        next_frontier = numpy.zeros_like(frontier)
+        for direction in range(4):
+            next_frontier[:size] |= frontier[neighbors[:, direction]]
+        next_frontier &= ~reached
+        table[next_frontier[:size]] = distance
+        reached |= next_frontier
+        frontier = next_frontier
+    return table
+
+def build_table(walls):
+    """
+    Returns the all-pairs maze distances of the open cells of 'walls' as a
+    flat uint16 array (a NumPy array or an array('H')), UNREACHABLE for
+    pairs that are not connected.
+    """
+    graph = get_cell_graph(walls)
+    if numpy is not None:
+        return _numpy_table(graph.neighbors, graph.size).ravel()
+    table = array.array('H')
+    for source in range(graph.size):
+        table.extend(UNREACHABLE if distance < 0 else distance
+                     for distance in _python_distances(graph.neighbors, graph.size, [source]))
+    return table
+
+def _is_valid_table(path, walls):
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER_SIZE)
+            size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return False
+    if len(header) != _HEADER_SIZE or header[:4] != _MAGIC: return False
+    cells = int.from_bytes(header[4:], 'little')
+    return cells == len(open_cells(walls)) and size == _HEADER_SIZE + 2 * cells * cells
+
+def _write_table(path, walls):
+    table = build_table(walls)
+    cells = len(open_cells(walls))
+    util.write_cache_file(path, [_MAGIC + cells.to_bytes(4, 'little'), table.tobytes()])
@@ -54,6 +54,41 @@ import os
 # YOUR INTERFACE TO THE PACMAN WORLD: A GameState #
 ###################################################
 
+class ExploredTracker:
+    """
+    Counts the successors generated by GameState.generate_successor and, if
+    record_ids is set, the distinct states involved, by a key made of plain
+    values (agent configurations and scared timers, the food bits, the
+    capsules and the score). Only the keys are kept, so tracking never keeps
+    states alive.
+    """
+    def __init__(self, record_ids=True):
+        self.generated = 0
+        self.ids = set() if record_ids else None
+
+    def add(self, parent, child):
+        self.generated += 1
+        if self.ids is not None:
+            self.ids.add(self.get_key(parent))
+            self.ids.add(self.get_key(child))
+
+    def get_key(self, state):
+        data = state.data
+        agents = tuple((agent_state.configuration.pos, agent_state.configuration.direction,
+                        agent_state.scared_timer) for agent_state in data.agent_states)
+        return (agents, data.food.bits, tuple(data.capsules), data.score)
+
+    def reset(self):
+        """
+        Starts counting over and returns the keys recorded so far, or an
+        empty set if ids are not recorded.
+        """
+        ids = self.ids
+        self.generated = 0
+        if ids is None: return set()
+        self.ids = set()
+        return ids
+
 class GameState:
     """
     A GameState specifies the full game state, including the food, capsules,
@@ -73,12 +108,33 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had get_legal_actions called
-    explored = set()
+    # static variable with the ExploredTracker told about every generated
+    # successor; None (the default) turns tracking off
+    explored_tracker = None
+
+    def set_explored_tracker(tracker):
+        """
+        Installs an ExploredTracker for every GameState, or removes it when
+        tracker is None, and returns the previous one.
+        """
+        previous = GameState.explored_tracker
+        GameState.explored_tracker = tracker
+        return previous
+    set_explored_tracker = staticmethod(set_explored_tracker)
+
     def get_and_reset_explored():
-        tmp = GameState.explored.copy()
-        GameState.explored = set()
-        return tmp
+        """
+        Returns the keys of the distinct states that were a parent or a child
+        of generate_successor since the last call, and resets the installed
+        tracker. The first call turns tracking on, so it returns an empty
+        set; a tracker that only counts is kept as it is and also returns an
+        empty set.
+        """
+        tracker = GameState.explored_tracker
+        if tracker is None:
+            GameState.explored_tracker = ExploredTracker()
+            return set()
+        return tracker.reset()
     get_and_reset_explored = staticmethod(get_and_reset_explored)
 
     def get_legal_actions(self, agent_index=0):
@@ -122,8 +178,8 @@ class GameState:
         # Bookkeeping
         state.data._agent_moved = agent_index
         state.data.score += state.data.score_change
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.explored_tracker is not None:
+            GameState.explored_tracker.add(self, state)
         return state
 
     def get_legal_pacman_actions(self):
@@ -366,7 +422,7 @@ class PacmanRules:
             state.data.food = state.data.food.copy()
             state.data.food[x][y] = False
             state.data._food_eaten = position
-            # TODO: cache num_food?
+            # The food is a BitGrid, which keeps its count
             num_food = state.get_num_food()
             if num_food == 0 and not state.data._lose:
                 state.data.score_change += 500
@@ -16,6 +16,10 @@
 In search.py, you will implement generic search algorithms which are called by
 Pacman agents (in search_agents.py).
 """
+import collections
+import json
+import time
+import weakref
 import util
 
 class SearchProblem:
@@ -74,6 +78,10 @@ def tiny_maze_search(problem):
 # def addSuccessors(problem, addCost=True):
 
 class SearchNode:
+    # Nodes are allocated for every generated successor, so they keep their
+    # fields in slots instead of a per-instance __dict__
+    __slots__ = ('state', 'action', 'cost', 'parent')
+
     def __init__(self, parent, node_info):
         """
             parent: parent SearchNode.
@@ -89,17 +97,11 @@ class SearchNode:
             cost: cost of reaching this node from the starting node.
         """
 
-        self.__state = node_info[0]
+        self.state = node_info[0]
         self.action = node_info[1]
         self.cost = node_info[2] if parent is None else node_info[2] + parent.cost
         self.parent = parent
 
-    # The coordinates of a node cannot be modified, se we just define a getter.
-    # This allows the class to be hashable.
-    @property
-    def state(self):
-        return self.__state
-
     def get_path(self):
         path = []
         current_node = self
@@ -109,16 +111,125 @@ class SearchNode:
         path.reverse()
         return path
     
-    # Consider 2 nodes to be equal if their coordinates are equal (regardless of everything else)
-    # def __eq__(self, __o: obj) -> bool:
-    #     if (type(__o) is SearchNode):
-    #         return self.__state == __o.__state
-    #     return False
+    # Consider 2 nodes to be equal if their coordinates are equal (regardless of everything else).
+    # This lets util.IndexedPriorityQueue find the queued node of a state in O(1).
+    # The state must not be modified once the node is created.
+    def __eq__(self, __o: object) -> bool:
+        if (type(__o) is SearchNode):
+            return self.state == __o.state
+        return False
+
+    def __hash__(self) -> int:
+        return hash(self.state)
+
+class SearchStats:
+    """
+    Statistics of one run of a search function. The search functions of this
+    file take an optional 'stats' argument and fill it in while they search:
+
+      stats = SearchStats()
+      a_star_search(problem, heuristic, stats=stats)
+      print(stats.to_json())
+
+    algorithm:      name of the search function
+    expanded:       states expanded (calls to problem.get_successors, or jump
+                    points for jump_point_search)
+    generated:      successors returned by those expansions
+    peak_frontier:  largest number of entries in the frontier
+    closed:         states the search remembered as expanded or reached at the end
+    successor_time: seconds spent generating successors
+    heuristic_time: seconds spent in the heuristic
+    elapsed:        seconds from the start to the end of the search
+    """
+    def __init__(self):
+        self.algorithm = None
+        self.expanded = 0
+        self.generated = 0
+        self.peak_frontier = 0
+        self.closed = 0
+        self.successor_time = 0.0
+        self.heuristic_time = 0.0
+        self.elapsed = 0.0
+        self._start_time = None
+
+    def start(self, algorithm, problem, heuristic=None):
+        """
+        Starts the clock and returns the problem and heuristic to search with,
+        which count and time themselves into these statistics.
+        """
+        self.algorithm = algorithm
+        self._start_time = time.perf_counter()
+        if heuristic is not None:
+            heuristic = self._timed_heuristic(heuristic)
+        return InstrumentedProblem(problem, self), heuristic
+
+    def _timed_heuristic(self, heuristic):
+        def timed_heuristic(state, problem=None):
+            start_time = time.perf_counter()
+            value = heuristic(state, problem)
+            self.heuristic_time += time.perf_counter() - start_time
+            return value
+        return timed_heuristic
+
+    def observe_frontier(self, size):
+        if size > self.peak_frontier: self.peak_frontier = size
+
+    def stop(self, closed_size):
+        """Stops the clock, recording how many states the search remembered."""
+        self.elapsed = time.perf_counter() - self._start_time
+        self.closed = closed_size
+
+    def expansions_per_second(self):
+        return self.expanded / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {'algorithm': self.algorithm,
+                'expanded': self.expanded,
+                'generated': self.generated,
+                'peak_frontier': self.peak_frontier,
+                'closed': self.closed,
+                'successor_time': self.successor_time,
+                'heuristic_time': self.heuristic_time,
+                'elapsed': self.elapsed,
+                'expansions_per_second': self.expansions_per_second()}
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), sort_keys=True)
+
+class InstrumentedProblem:
+    """
+    View of a search problem that counts and times get_successors into a
+    SearchStats. Every other attribute is read from and written to the
+    wrapped problem, so its own bookkeeping (e.g. problem._expanded) is kept.
+    """
+    def __init__(self, problem, stats):
+        object.__setattr__(self, 'problem', problem)
+        object.__setattr__(self, 'stats', stats)
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.problem, name, value)
 
-    # # def __hash__(self) -> int:
-    # #     return hash(self.__state)
+    def get_start_state(self):
+        return self.problem.get_start_state()
+
+    def is_goal_state(self, state):
+        return self.problem.is_goal_state(state)
 
-def depth_first_search(problem):
+    def get_successors(self, state):
+        start_time = time.perf_counter()
+        successors = self.problem.get_successors(state)
+        self.stats.successor_time += time.perf_counter() - start_time
+        self.stats.expanded += 1
+        self.stats.generated += len(successors)
+        return successors
+
+    def get_cost_of_actions(self, actions):
+        return self.problem.get_cost_of_actions(actions)
+
+def depth_first_search(problem, stats=None):
     """
     Search the deepest nodes in the search tree first.
 
@@ -131,7 +242,10 @@ def depth_first_search(problem):
     print("Start:", problem.get_start_state())
     print("Is the start a goal?", problem.is_goal_state(problem.get_start_state()))
     print("Start's successors:", problem.get_successors(problem.get_start_state()))
+
+    Pass a SearchStats as 'stats' to collect statistics of the search.
     """
+    if stats is not None: problem, _ = stats.start('depth_first_search', problem)
 
     # Initialize stack (LIFO) for depth-first traversal
     stack = util.Stack()
@@ -144,11 +258,13 @@ def depth_first_search(problem):
     
     # Main search loop - continue until stack is empty or goal found
     while not stack.is_empty():
+        if stats is not None: stats.observe_frontier(len(stack.list))
         # Get the most recently added node (LIFO behavior)
         current_node = stack.pop()
 
         # Goal test - return path if we've reached the goal
         if problem.is_goal_state(current_node.state):
+            if stats is not None: stats.stop(len(visited))
             return current_node.get_path()  # Reconstruct and return path from root to goal
 
         # Mark current state as visited to prevent cycles
@@ -161,10 +277,12 @@ def depth_first_search(problem):
             if successor[0] not in visited:
                 stack.push(SearchNode(current_node, successor))  # Create node with parent link for path reconstruction
 
+    if stats is not None: stats.stop(len(visited))
 
 
-def breadth_first_search(problem):
+def breadth_first_search(problem, stats=None):
     """Search the shallowest nodes in the search tree first."""
+    if stats is not None: problem, _ = stats.start('breadth_first_search', problem)
     # Initialize queue (FIFO) for breadth-first traversal
     queue = util.Queue()
     # Track states we've already encountered
@@ -177,11 +295,13 @@ def breadth_first_search(problem):
 
     # Main search loop - explore level by level
     while not queue.is_empty():
+        if stats is not None: stats.observe_frontier(len(queue.list))
         # Get the oldest node in queue (FIFO behavior)
         current_node = queue.pop()
         
         # Goal test - return path if we've reached the goal
         if problem.is_goal_state(current_node.state):
+            if stats is not None: stats.stop(len(found))
             return current_node.get_path()  # Reconstruct and return path from root to goal
         
         # Mark as visited only when expanding (not when adding to queue)
@@ -195,10 +315,14 @@ def breadth_first_search(problem):
                 if successor[0] not in found:
                     queue.push(SearchNode(current_node, successor))  # Add successor to back of queue
 
-def uniform_cost_search(problem):
+    if stats is not None: stats.stop(len(found))
+
+def uniform_cost_search(problem, stats=None):
     """Search the node of least total cost first."""
-    # Initialize priority queue - nodes ordered by path cost (g(n))
-    priority_queue = util.PriorityQueue()
+    if stats is not None: problem, _ = stats.start('uniform_cost_search', problem)
+    # Initialize priority queue - nodes ordered by path cost (g(n)). The indexed
+    # queue turns update() into an O(log n) decrease-key on the node's state
+    priority_queue = util.IndexedPriorityQueue()
     # Dictionary to track the minimum cost to reach each state
     # (PriorityQueue doesn't provide direct access to stored costs)
     found_costs = dict()
@@ -210,12 +334,14 @@ def uniform_cost_search(problem):
 
     # Main search loop - always expand lowest-cost node
     while not priority_queue.is_empty():
+        if stats is not None: stats.observe_frontier(len(priority_queue.heap))
         # Pop node with lowest path cost
         expanded_node = priority_queue.pop()
         expanded_state = expanded_node.state
 
         # Goal test - return path if we've reached the goal
         if problem.is_goal_state(expanded_state):
+            if stats is not None: stats.stop(len(found_costs))
             return expanded_node.get_path()
                 
         # Expand current node - process all successors
@@ -231,6 +357,7 @@ def uniform_cost_search(problem):
                 found_costs[new_state] = cost_to_new_state
                 new_node = SearchNode(expanded_node, (new_state, new_action, cost_to_new_state)) 
                 priority_queue.update(new_node, cost_to_new_state)  # Update priority queue with new/better path
+    if stats is not None: stats.stop(len(found_costs))
     return None
 
 def null_heuristic(state, problem=None):
@@ -240,10 +367,76 @@ def null_heuristic(state, problem=None):
     """
     return 0
 
-def a_star_search(problem, heuristic=null_heuristic):
+class HeuristicCache:
+    """
+    Wraps a heuristic and memoizes h(state) per problem, so that states that
+    are reached again, in the same search or in later searches on the same
+    problem, don't pay for the heuristic twice:
+
+      heuristic = HeuristicCache(food_heuristic, max_size=50000)
+      search.a_star_search(problem, heuristic)
+      print(heuristic.hits, heuristic.misses)
+
+    The memo of each problem is an OrderedDict kept in problem.heuristic_info
+    under the key ('heuristic_cache', wrapper), so it lives as long as the
+    problem, never collides with what the heuristic itself stores there, and
+    two wrappers of the same heuristic keep their own bounds and counts.
+    Problems without heuristic_info get their memo in the wrapper instead,
+    held weakly when the problem can be weakly referenced (problem=None
+    cannot, so its memo lives as long as the wrapper).
+    Once a memo holds max_size states, the least recently used one is evicted;
+    max_size=None never evicts.
+    """
+    def __init__(self, heuristic, max_size=100000):
+        self.heuristic = heuristic
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._caches = weakref.WeakKeyDictionary()
+        self._strong_caches = {}
+
+    def __call__(self, state, problem=None):
+        cache = self.get_cache(problem)
+        if state in cache:
+            self.hits += 1
+            cache.move_to_end(state)
+            return cache[state]
+        self.misses += 1
+        value = self.heuristic(state, problem)
+        cache[state] = value
+        if self.max_size is not None and len(cache) > self.max_size:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def get_cache(self, problem):
+        """Returns the OrderedDict that memoizes the heuristic for 'problem'."""
+        info = getattr(problem, 'heuristic_info', None)
+        if isinstance(info, dict):
+            key = ('heuristic_cache', self)
+            if key not in info: info[key] = collections.OrderedDict()
+            return info[key]
+        try:
+            if problem not in self._caches:
+                self._caches[problem] = collections.OrderedDict()
+            return self._caches[problem]
+        except TypeError:
+            # Not weakly referenceable, e.g. None
+            if problem not in self._strong_caches:
+                self._strong_caches[problem] = collections.OrderedDict()
+            return self._strong_caches[problem]
+
+    def hit_rate(self):
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+def a_star_search(problem, heuristic=null_heuristic, stats=None):
     """Search the node that has the lowest combined cost and heuristic first."""
-    # Initialize priority queue - nodes ordered by f(n) = g(n) + h(n)
-    priority_queue = util.PriorityQueue()
+    if stats is not None: problem, heuristic = stats.start('a_star_search', problem, heuristic)
+    # Initialize priority queue - nodes ordered by f(n) = g(n) + h(n). The indexed
+    # queue turns update() into an O(log n) decrease-key on the node's state
+    priority_queue = util.IndexedPriorityQueue()
     # Dictionary to track the minimum path cost (g(n)) to reach each state
     found_costs = dict()
 
@@ -254,12 +447,14 @@ def a_star_search(problem, heuristic=null_heuristic):
 
     # Main search loop - always expand node with lowest f(n) = g(n) + h(n)
     while not priority_queue.is_empty():
+        if stats is not None: stats.observe_frontier(len(priority_queue.heap))
         # Pop node with lowest estimated total cost (f = g + h)
         expanded_node = priority_queue.pop()
         expanded_state = expanded_node.state
 
         # Goal test - return path if we've reached the goal
         if problem.is_goal_state(expanded_state):
+            if stats is not None: stats.stop(len(found_costs))
             return expanded_node.get_path()
                 
         # Expand current node - process all successors
@@ -281,11 +476,659 @@ def a_star_search(problem, heuristic=null_heuristic):
                 new_node = SearchNode(expanded_node, (new_state, new_action, cost_to_new_state)) 
                 priority_queue.update(new_node, f_n)  # Priority by f(n) = g(n) + h(n)
 
+    if stats is not None: stats.stop(len(found_costs))
     return None
-    
+
+def lazy_uniform_cost_search(problem, stats=None):
+    """
+    Search the node of least total cost first, using lazy deletion and a
+    closed set (see lazy_a_star_search).
+
+    On bigMaze it expands the same 620 cells as uniform_cost_search:
+
+    >>> import layout, pacman, search_agents
+    >>> game_state = pacman.GameState()
+    >>> game_state.initialize(layout.get_layout('bigMaze'), 0)
+    >>> problem = search_agents.PositionSearchProblem(game_state, warn=False, visualize=False)
+    >>> len(lazy_uniform_cost_search(problem)), problem._expanded
+    (210, 620)
+    """
+    return lazy_a_star_search(problem, stats=stats)
+
+def lazy_a_star_search(problem, heuristic=null_heuristic, stats=None):
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+
+    Instead of updating queued nodes in place, a cheaper path to a state pushes
+    a duplicate node, and outdated duplicates are skipped when popped by
+    comparing their cost against found_costs. Expanded states go to a closed
+    set and are never expanded again, so the returned path is optimal as long
+    as the heuristic is consistent.
+
+    With the Manhattan distance, it finds the 210-step path through bigMaze
+    after expanding 549 cells, as a_star_search does:
+
+    >>> import layout, pacman, search_agents
+    >>> game_state = pacman.GameState()
+    >>> game_state.initialize(layout.get_layout('bigMaze'), 0)
+    >>> problem = search_agents.PositionSearchProblem(game_state, warn=False, visualize=False)
+    >>> len(lazy_a_star_search(problem, search_agents.manhattan_heuristic)), problem._expanded
+    (210, 549)
+    """
+    if stats is not None: problem, heuristic = stats.start('lazy_a_star_search', problem, heuristic)
+    # Plain binary heap - duplicates are allowed, so pushes never scan the heap
+    priority_queue = util.PriorityQueue()
+    # Dictionary to track the minimum path cost (g(n)) to reach each state
+    found_costs = dict()
+    # States that have already been expanded
+    closed = set()
+
+    # Initialize search with root node
+    initial_state = problem.get_start_state()
+    found_costs[initial_state] = 0  # g(start) = 0
+    priority_queue.push(SearchNode(None, (initial_state, None, 0)), heuristic(initial_state, problem))
+
+    while not priority_queue.is_empty():
+        if stats is not None: stats.observe_frontier(len(priority_queue.heap))
+        expanded_node = priority_queue.pop()
+        expanded_state = expanded_node.state
+
+        # Skip stale entries: the state was already expanded, or a cheaper path
+        # to it was found after this node was pushed
+        if expanded_state in closed or expanded_node.cost > found_costs[expanded_state]:
+            continue
+
+        # Goal test - return path if we've reached the goal
+        if problem.is_goal_state(expanded_state):
+            if stats is not None: stats.stop(len(closed))
+            return expanded_node.get_path()
+
+        closed.add(expanded_state)
+
+        # Expand current node - process all successors
+        for successor_info in problem.get_successors(expanded_state):
+            new_state, new_action, new_cost = successor_info
+            if new_state in closed:
+                continue
+
+            # Calculate g(n): actual cost from start to this successor
+            cost_to_new_state = expanded_node.cost + new_cost
+
+            # Push a new entry if we found a cheaper path to this state
+            if new_state not in found_costs or cost_to_new_state < found_costs[new_state]:
+                found_costs[new_state] = cost_to_new_state
+                # SearchNode adds the step cost to its parent's cost itself
+                new_node = SearchNode(expanded_node, successor_info)
+                priority_queue.push(new_node, cost_to_new_state + heuristic(new_state, problem))
+
+    if stats is not None: stats.stop(len(closed))
+    return None
+
+class ReversedProblem:
+    """
+    View of a single-goal problem with the start and the goal swapped, used to
+    evaluate heuristics towards the start in the backward half of a
+    bidirectional search. Every other attribute is read from the wrapped problem.
+    """
+    def __init__(self, problem):
+        self.problem = problem
+        self.goal = problem.get_start_state()
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+    def get_start_state(self):
+        return self.problem.goal
+
+    def is_goal_state(self, state):
+        return state == self.goal
+
+def _join_paths(forward_parents, backward_parents, meeting_state):
+    """
+    Builds the path through meeting_state from the parent links of both halves
+    of a bidirectional search. Forward links are state -> (parent, action) and
+    backward links are state -> (next state towards the goal, action).
+    """
+    path = []
+    state = meeting_state
+    while forward_parents[state] is not None:
+        state, action = forward_parents[state]
+        path.append(action)
+    path.reverse()
+    state = meeting_state
+    while backward_parents[state] is not None:
+        state, action = backward_parents[state]
+        path.append(action)
+    return path
+
+def bidirectional_breadth_first_search(problem, stats=None):
+    """
+    Search from the start and from the goal at the same time, expanding one
+    whole level of the smaller frontier at a time, and join both searches at
+    the first level where they meet.
+
+    Only for problems with a single goal state stored in problem.goal, whose
+    moves are Directions that can be undone with the reverse direction and
+    whose steps all cost 1, such as PositionSearchProblem.
+
+    On openMaze it finds a path as short as breadth_first_search's after
+    expanding 452 cells instead of 682:
+
+    >>> import layout, pacman, search_agents
+    >>> game_state = pacman.GameState()
+    >>> game_state.initialize(layout.get_layout('openMaze'), 0)
+    >>> problem = search_agents.PositionSearchProblem(game_state, warn=False, visualize=False)
+    >>> len(bidirectional_breadth_first_search(problem)), problem._expanded
+    (54, 452)
+    """
+    from game import Actions
+    if stats is not None: problem, _ = stats.start('bidirectional_breadth_first_search', problem)
+    start, goal = problem.get_start_state(), problem.goal
+    if problem.is_goal_state(start):
+        if stats is not None: stats.stop(1)
+        return []
+
+    # state -> (parent, action, depth), one dictionary per direction
+    parents = [{start: None}, {goal: None}]
+    depths = [{start: 0}, {goal: 0}]
+    frontiers = [[start], [goal]]
+
+    while frontiers[0] and frontiers[1]:
+        if stats is not None: stats.observe_frontier(len(frontiers[0]) + len(frontiers[1]))
+        # Expand the smaller frontier: 0 is forward, 1 is backward
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        side_parents, side_depths = parents[side], depths[side]
+        other_depths = depths[1 - side]
+        best_cost, meeting_state = None, None
+        next_frontier = []
+        for state in frontiers[side]:
+            depth = side_depths[state] + 1
+            for successor, action, _ in problem.get_successors(state):
+                if successor in side_depths:
+                    continue
+                if side == 1:
+                    # Backward links store the action that leads towards the goal
+                    action = Actions.reverse_direction(action)
+                side_parents[successor] = (state, action)
+                side_depths[successor] = depth
+                next_frontier.append(successor)
+                if successor in other_depths:
+                    cost = depth + other_depths[successor]
+                    if best_cost is None or cost < best_cost:
+                        best_cost, meeting_state = cost, successor
+        if meeting_state is not None:
+            problem.is_goal_state(goal)  # Keeps the goal bookkeeping of the problem
+            if stats is not None: stats.stop(len(depths[0]) + len(depths[1]))
+            return _join_paths(parents[0], parents[1], meeting_state)
+        frontiers[side] = next_frontier
+
+    if stats is not None: stats.stop(len(depths[0]) + len(depths[1]))
+    return None
+
+def bidirectional_a_star_search(problem, heuristic=null_heuristic, stats=None):
+    """
+    Front-to-end bidirectional A*: a forward A* towards problem.goal and a
+    backward A* towards the start run alternately, always advancing the
+    smaller frontier. The heuristic is evaluated on a ReversedProblem in the
+    backward search, so heuristics that read problem.goal estimate the
+    distance to the start there.
+
+    The search stops as soon as the smallest f value of either frontier can
+    no longer improve the best path found through a state reached from both
+    sides, which keeps the result optimal for consistent heuristics.
+
+    Only for problems with a single goal state stored in problem.goal, whose
+    moves are Directions that can be undone with the reverse direction and
+    whose step costs do not depend on the direction of travel.
+
+    With the Manhattan distance on openMaze, it finds a path as short as
+    a_star_search's after expanding 433 cells instead of 535:
+
+    >>> import layout, pacman, search_agents
+    >>> game_state = pacman.GameState()
+    >>> game_state.initialize(layout.get_layout('openMaze'), 0)
+    >>> problem = search_agents.PositionSearchProblem(game_state, warn=False, visualize=False)
+    >>> len(bidirectional_a_star_search(problem, search_agents.manhattan_heuristic)), problem._expanded
+    (54, 433)
+    """
+    from game import Actions
+    if stats is not None: problem, heuristic = stats.start('bidirectional_a_star_search', problem, heuristic)
+    start, goal = problem.get_start_state(), problem.goal
+    if problem.is_goal_state(start):
+        if stats is not None: stats.stop(0)
+        return []
+
+    problems = [problem, ReversedProblem(problem)]
+    parents = [{start: None}, {goal: None}]
+    found_costs = [{start: 0}, {goal: 0}]
+    closed = [set(), set()]
+    priority_queues = [util.PriorityQueue(), util.PriorityQueue()]
+    priority_queues[0].push(start, heuristic(start, problems[0]))
+    priority_queues[1].push(goal, heuristic(goal, problems[1]))
+
+    best_cost, meeting_state = float('inf'), None
+    while not priority_queues[0].is_empty() and not priority_queues[1].is_empty():
+        # Any cheaper path would go through a queued state of each frontier, so
+        # stop once the smallest f value of either frontier reaches best_cost
+        # (stale entries can only make these values smaller)
+        if max(priority_queues[0].heap[0][0], priority_queues[1].heap[0][0]) >= best_cost:
+            break
+        if stats is not None: stats.observe_frontier(len(priority_queues[0].heap) + len(priority_queues[1].heap))
+        # Expand the smaller frontier: 0 is forward, 1 is backward
+        side = 0 if len(priority_queues[0].heap) <= len(priority_queues[1].heap) else 1
+        state = priority_queues[side].pop()
+        if state in closed[side]:
+            continue
+        closed[side].add(state)
+
+        side_costs, other_costs = found_costs[side], found_costs[1 - side]
+        for successor, action, step_cost in problem.get_successors(state):
+            if successor in closed[side]:
+                continue
+            cost = side_costs[state] + step_cost
+            if successor not in side_costs or cost < side_costs[successor]:
+                side_costs[successor] = cost
+                if side == 1:
+                    # Backward links store the action that leads towards the goal
+                    action = Actions.reverse_direction(action)
+                parents[side][successor] = (state, action)
+                priority_queues[side].push(successor, cost + heuristic(successor, problems[side]))
+                if successor in other_costs and cost + other_costs[successor] < best_cost:
+                    best_cost, meeting_state = cost + other_costs[successor], successor
+
+    if stats is not None: stats.stop(len(closed[0]) + len(closed[1]))
+    if meeting_state is None:
+        return None
+    problem.is_goal_state(goal)  # Keeps the goal bookkeeping of the problem
+    return _join_paths(parents[0], parents[1], meeting_state)
+
+
+def iterative_deepening_a_star_search(problem, heuristic=null_heuristic, stats=None):
+    """
+    Iterative deepening A* (IDA*): a series of depth-first searches, each one
+    bounded by a threshold on f(n) = g(n) + h(n). Every iteration raises the
+    threshold to the smallest f value that exceeded it in the previous one.
+
+    Only the current path is kept in memory (one successor list per level), so
+    memory grows with the depth of the solution instead of with the number of
+    generated nodes. States are not re-entered along the current path, but
+    may be expanded again from other paths and in later iterations.
+
+    The threshold and number of expansions of every iteration are stored in
+    problem._ida_iterations as a list of {'threshold', 'expanded'} dictionaries.
+    With 'stats', the frontier is the current path and nothing is closed.
+    """
+    if stats is not None: problem, heuristic = stats.start('iterative_deepening_a_star_search', problem, heuristic)
+    start = problem.get_start_state()
+    iterations = []
+    problem._ida_iterations = iterations
+    if problem.is_goal_state(start):
+        if stats is not None: stats.stop(0)
+        return []
+
+    threshold = heuristic(start, problem)
+    while True:
+        next_threshold = float('inf')
+        # The current path: its states, their path costs, the actions between
+        # them and the successors that are still left to try at every level
+        path_states, on_path, path_costs, actions = [start], {start}, [0], []
+        pending = [iter(problem.get_successors(start))]
+        expanded = 1
+
+        while pending:
+            for successor, action, step_cost in pending[-1]:
+                if successor in on_path:
+                    continue
+                cost = path_costs[-1] + step_cost
+                f_n = cost + heuristic(successor, problem)
+                if f_n > threshold:
+                    next_threshold = min(next_threshold, f_n)
+                    continue
+                actions.append(action)
+                if problem.is_goal_state(successor):
+                    iterations.append({'threshold': threshold, 'expanded': expanded})
+                    if stats is not None: stats.stop(0)
+                    return actions
+                # Go one level deeper
+                path_states.append(successor)
+                on_path.add(successor)
+                path_costs.append(cost)
+                pending.append(iter(problem.get_successors(successor)))
+                expanded += 1
+                if stats is not None: stats.observe_frontier(len(pending))
+                break
+            else:
+                # Every successor of the deepest state was tried: backtrack
+                pending.pop()
+                on_path.discard(path_states.pop())
+                path_costs.pop()
+                if actions: actions.pop()
+
+        iterations.append({'threshold': threshold, 'expanded': expanded})
+        if next_threshold == float('inf'):
+            if stats is not None: stats.stop(0)
+            return None
+        threshold = next_threshold
+
+
+def anytime_a_star_search(problem, heuristic=null_heuristic, time_limit=None, deadline=None,
+                          initial_weight=3.0, weight_step=0.5, stats=None):
+    """
+    Anytime repairing A* (ARA*): a weighted A* search, ordered by
+    f(n) = g(n) + weight * h(n), that quickly finds a first path with a large
+    weight and then lowers the weight by weight_step while time remains. Each
+    new search reuses the costs found so far and only re-expands the states
+    whose cost improved, so later iterations are much cheaper than a fresh A*.
+
+    The search stops at time_limit seconds from now or at 'deadline' (a
+    time.time() value), whichever comes first, and returns the best path
+    found; the first path is always searched to the end, as there is nothing
+    to return before it. With a consistent heuristic, every path found costs
+    at most 'bound' times the optimal cost, and once the bound reaches 1 the
+    path is optimal.
+
+    Every iteration is recorded in problem._ara_iterations as a dictionary
+    with its 'weight', the 'cost' and 'bound' of the best path so far, the
+    'expanded' count and the 'elapsed' seconds, and the bound of the returned
+    path is stored in problem._ara_bound.
+
+    Without a time limit, the weight goes down to 1 and the path is optimal:
+
+    >>> import layout, pacman, search_agents
+    >>> game_state = pacman.GameState()
+    >>> game_state.initialize(layout.get_layout('bigMaze'), 0)
+    >>> problem = search_agents.PositionSearchProblem(game_state, warn=False, visualize=False)
+    >>> len(anytime_a_star_search(problem, search_agents.manhattan_heuristic)), problem._ara_bound
+    (210, 1.0)
+    >>> [iteration['weight'] for iteration in problem._ara_iterations]
+    [3.0, 2.5, 2.0, 1.5, 1.0]
+    """
+    if stats is not None: problem, heuristic = stats.start('anytime_a_star_search', problem, heuristic)
+    start_time = time.time()
+    if time_limit is not None:
+        deadline = start_time + time_limit if deadline is None else min(deadline, start_time + time_limit)
+    iterations = []
+    problem._ara_iterations = iterations
+    problem._ara_bound = None
+
+    start = problem.get_start_state()
+    costs = {start: 0}
+    parents = {start: None}
+    heuristic_values = {start: heuristic(start, problem)}
+    # Open states with their current priority, and closed states whose cost
+    # improved after they were expanded (inconsistent states)
+    open_keys = {start: initial_weight * heuristic_values[start]}
+    inconsistent = set()
+    best_state, best_cost, best_path = None, float('inf'), None
+    if problem.is_goal_state(start):
+        best_state, best_cost = start, 0
+
+    def get_path(state):
+        # Ancestors may have been improved after 'state' was reached, so the
+        # path can cost less than costs[state]
+        path, path_cost = [], 0
+        while parents[state] is not None:
+            state, action, step_cost = parents[state]
+            path.append(action)
+            path_cost += step_cost
+        path.reverse()
+        return path, path_cost
+
+    weight = initial_weight
+    expanded = 0
+    while True:
+        priority_queue = util.PriorityQueue()
+        for state, key in open_keys.items():
+            priority_queue.push(state, key)
+        closed = set()
+        timed_out = False
+
+        # Weighted A* until no open state can lead to a cheaper path
+        while not priority_queue.is_empty() and priority_queue.heap[0][0] < best_cost:
+            if stats is not None: stats.observe_frontier(len(priority_queue.heap))
+            # The first search always runs to the end
+            if deadline is not None and best_path is not None and time.time() >= deadline:
+                timed_out = True
+                break
+            state = priority_queue.pop()
+            if state in closed or state not in open_keys:
+                continue
+            del open_keys[state]
+            closed.add(state)
+            expanded += 1
+            for successor, action, step_cost in problem.get_successors(state):
+                cost = costs[state] + step_cost
+                if successor in costs and cost >= costs[successor]:
+                    continue
+                costs[successor] = cost
+                parents[successor] = (state, action, step_cost)
+                if successor not in heuristic_values:
+                    heuristic_values[successor] = heuristic(successor, problem)
+                if successor in closed:
+                    inconsistent.add(successor)
+                else:
+                    open_keys[successor] = cost + weight * heuristic_values[successor]
+                    priority_queue.push(successor, open_keys[successor])
+                if cost < best_cost and problem.is_goal_state(successor):
+                    best_state, best_cost = successor, cost
+
+        if best_state is None:
+            # There is no path to a goal
+            if stats is not None: stats.stop(len(costs))
+            return None
+
+        best_path, best_cost = get_path(best_state)
+        if timed_out:
+            # An interrupted search proves nothing new, but any path it found
+            # is cheaper than the previous one, so the previous bound holds
+            bound = problem._ara_bound
+        else:
+            # No path can be cheaper than the smallest g + h of a state whose
+            # cost may still improve
+            pending = [costs[s] + heuristic_values[s] for s in open_keys] + \
+                      [costs[s] + heuristic_values[s] for s in inconsistent]
+            lower_bound = min(pending + [best_cost])
+            bound = min(weight, best_cost / lower_bound) if lower_bound > 0 else weight
+            if best_cost == 0: bound = 1.0
+        problem._ara_bound = bound
+        iterations.append({'weight': weight, 'cost': best_cost, 'bound': bound,
+                           'expanded': expanded, 'elapsed': time.time() - start_time})
+
+        if timed_out or bound <= 1 or weight <= 1 or (deadline is not None and time.time() >= deadline):
+            break
+
+        # Tighten the weight and search again from the open and inconsistent states
+        weight = max(1.0, weight - weight_step)
+        for state in set(open_keys) | inconsistent:
+            open_keys[state] = costs[state] + weight * heuristic_values[state]
+        inconsistent = set()
+
+    if stats is not None: stats.stop(len(costs))
+    return best_path
+
+
+def corridor_a_star_search(problem, heuristic=null_heuristic, stats=None):
+    """
+    A* over the corridor-contracted graph of a position-based problem (see
+    corridors.py): only junctions, dead ends and the cells the problem cares
+    about are expanded, and the path found is expanded back into one
+    Direction per step.
+
+    With the Manhattan distance on bigMaze, it finds a path as short as
+    a_star_search's after expanding 153 cells instead of 549:
+
+    >>> import layout, pacman, search_agents
+    >>> game_state = pacman.GameState()
+    >>> game_state.initialize(layout.get_layout('bigMaze'), 0)
+    >>> problem = search_agents.PositionSearchProblem(game_state, warn=False, visualize=False)
+    >>> len(corridor_a_star_search(problem, search_agents.manhattan_heuristic)), problem._expanded
+    (210, 153)
+    """
+    import corridors
+    contracted = corridors.CorridorSearchProblem(problem)
+    path = a_star_search(contracted, contracted.wrap_heuristic(heuristic), stats=stats)
+    if stats is not None: stats.algorithm = 'corridor_a_star_search'
+    if path is None:
+        return None
+    return corridors.expand_path(path)
+
+def corridor_uniform_cost_search(problem, stats=None):
+    """
+    Uniform cost search over the corridor-contracted graph of a problem.
+
+    On bigMaze it expands 171 cells instead of uniform_cost_search's 620:
+
+    >>> import layout, pacman, search_agents
+    >>> game_state = pacman.GameState()
+    >>> game_state.initialize(layout.get_layout('bigMaze'), 0)
+    >>> problem = search_agents.PositionSearchProblem(game_state, warn=False, visualize=False)
+    >>> len(corridor_uniform_cost_search(problem)), problem._expanded
+    (210, 171)
+    """
+    return corridor_a_star_search(problem, stats=stats)
+
+
+def jump_point_search(problem, stats=None):
+    """
+    Jump Point Search (JPS) for 4-connected grids where every step costs 1,
+    such as PositionSearchProblem: an A* search with the Manhattan distance
+    that only expands jump points.
+
+    From every expanded cell the search moves straight on, without stopping at
+    the cells in between, until it reaches the goal, a wall, or a cell with a
+    forced neighbor (an open side cell whose cell behind is a wall). Moving
+    vertically, it also stops at cells from which a horizontal jump finds a
+    jump point. Cells are pruned according to the direction the search came
+    from, so symmetric paths through open areas are never generated.
+
+    Needs problem.walls and a single goal in problem.goal. Every expanded jump
+    point counts as one expansion in problem._expanded, and the path returned
+    is expanded back into one Direction per step.
+
+    On openMaze, it finds a path as short as breadth-first search's after
+    expanding 8 jump points instead of 682 cells:
+
+    >>> import layout, pacman, search_agents
+    >>> game_state = pacman.GameState()
+    >>> game_state.initialize(layout.get_layout('openMaze'), 0)
+    >>> problem = search_agents.PositionSearchProblem(game_state, warn=False, visualize=False)
+    >>> len(jump_point_search(problem)), problem._expanded
+    (54, 8)
+    """
+    from game import Actions
+    if stats is not None: problem, _ = stats.start('jump_point_search', problem)
+    walls, goal = problem.walls, problem.goal
+    width, height = walls.width, walls.height
+
+    def is_open(x, y):
+        return 0 <= x < width and 0 <= y < height and not walls[x][y]
+
+    # The outcome of a horizontal jump only depends on where it starts, and
+    # vertical jumps try horizontal ones from every cell they cross
+    horizontal_jumps = {}
+
+    def jump_horizontally(x, y, dx):
+        key = (x, y, dx)
+        if key not in horizontal_jumps:
+            jump_point = None
+            while is_open(x + dx, y):
+                x += dx
+                if (x, y) == goal or (is_open(x, y - 1) and not is_open(x - dx, y - 1)) \
+                        or (is_open(x, y + 1) and not is_open(x - dx, y + 1)):
+                    jump_point = (x, y)
+                    break
+            horizontal_jumps[key] = jump_point
+        return horizontal_jumps[key]
+
+    def jump_vertically(x, y, dy):
+        while is_open(x, y + dy):
+            y += dy
+            if (x, y) == goal or (is_open(x - 1, y) and not is_open(x - 1, y - dy)) \
+                    or (is_open(x + 1, y) and not is_open(x + 1, y - dy)):
+                return (x, y)
+            if jump_horizontally(x, y, 1) is not None or jump_horizontally(x, y, -1) is not None:
+                return (x, y)
+        return None
+
+    def jump(state, vector):
+        dx, dy = vector
+        if dx: return jump_horizontally(state[0], state[1], dx)
+        return jump_vertically(state[0], state[1], dy)
+
+    def distance_to_goal(state):
+        return abs(state[0] - goal[0]) + abs(state[1] - goal[1])
+
+    start = problem.get_start_state()
+    # jump point -> (parent jump point, unit vector from the parent)
+    parents = {start: None}
+    found_costs = {start: 0}
+    closed = set()
+    priority_queue = util.PriorityQueue()
+    priority_queue.push(start, distance_to_goal(start))
+
+    while not priority_queue.is_empty():
+        if stats is not None: stats.observe_frontier(len(priority_queue.heap))
+        state = priority_queue.pop()
+        if state in closed:
+            continue
+        if problem.is_goal_state(state):
+            if stats is not None: stats.stop(len(closed))
+            # Expand every straight segment back into single steps
+            path = []
+            while parents[state] is not None:
+                parent, vector = parents[state]
+                steps = abs(state[0] - parent[0]) + abs(state[1] - parent[1])
+                path.extend([Actions.vector_to_direction(vector)] * steps)
+                state = parent
+            path.reverse()
+            return path
+        closed.add(state)
+
+        # Bookkeeping of the problem, as in its get_successors
+        if hasattr(problem, '_expanded'): problem._expanded += 1
+        if hasattr(problem, '_visited') and state not in problem._visited:
+            problem._visited[state] = True
+            problem._visited_list.append(state)
+
+        # Only the directions that can start a shortest path not covered by the parent
+        if parents[state] is None:
+            vectors = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        else:
+            dx, dy = parents[state][1]
+            vectors = [(dx, 0), (0, 1), (0, -1)] if dx else [(0, dy), (1, 0), (-1, 0)]
+
+        # Jumping plays the part of successor generation
+        if stats is not None: jump_start_time = time.perf_counter()
+        jumps = [(vector, jump(state, vector)) for vector in vectors]
+        if stats is not None:
+            stats.successor_time += time.perf_counter() - jump_start_time
+            stats.expanded += 1
+            stats.generated += sum(1 for _, jump_point in jumps if jump_point is not None)
+
+        for vector, jump_point in jumps:
+            if jump_point is None or jump_point in closed:
+                continue
+            cost = found_costs[state] + abs(jump_point[0] - state[0]) + abs(jump_point[1] - state[1])
+            if jump_point not in found_costs or cost < found_costs[jump_point]:
+                found_costs[jump_point] = cost
+                parents[jump_point] = (state, vector)
+                priority_queue.push(jump_point, cost + distance_to_goal(jump_point))
+
+    if stats is not None: stats.stop(len(closed))
+    return None
+
 
 # Abbreviations
 bfs = breadth_first_search
 dfs = depth_first_search
 astar = a_star_search
-ucs = uniform_cost_search
\ No newline at end of file
+ucs = uniform_cost_search
+lazy_ucs = lazy_uniform_cost_search
+lazy_astar = lazy_a_star_search
+bibfs = bidirectional_breadth_first_search
+biastar = bidirectional_a_star_search
+idastar = iterative_deepening_a_star_search
+jps = jump_point_search
+arastar = anytime_a_star_search
+corridor_astar = corridor_a_star_search
+corridor_ucs = corridor_uniform_cost_search
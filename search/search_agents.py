@@ -42,6 +42,8 @@ from game import Grid
 import util
 import time
 import search
+import maze_distances
+import incremental_search
 
 class GoWestAgent(Agent):
     """An agent that goes West until it can't."""
@@ -70,12 +72,17 @@ class SearchAgent(Agent):
     Options for fn include:
       depth_first_search or dfs
       breadth_first_search or bfs
+      anytime_a_star_search or arastar, with budget=<seconds> for the search
 
+    The statistics of the search (see search.SearchStats) are kept in
+    self.search_stats; with the option stats=True they are also printed as
+    a JSON line.
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depth_first_search', prob='PositionSearchProblem', heuristic='null_heuristic'):
+    def __init__(self, fn='depth_first_search', prob='PositionSearchProblem', heuristic='null_heuristic', stats=False,
+                 budget=None):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
@@ -83,6 +90,12 @@ class SearchAgent(Agent):
         if fn not in dir(search):
             raise AttributeError(fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
+        # Extra keyword arguments of the search function
+        options = {}
+        if budget is not None:
+            if 'time_limit' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not take a time budget.')
+            options['time_limit'] = float(budget)
         if 'heuristic' not in func.__code__.co_varnames:
             print('[SearchAgent] using function ' + fn)
             self.searchFunction = func
@@ -95,13 +108,17 @@ class SearchAgent(Agent):
                 raise AttributeError(heuristic + ' is not a function in search_agents.py or search.py.')
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            if 'stats' in func.__code__.co_varnames:
+                self.searchFunction = lambda x, stats=None: func(x, heuristic=heur, stats=stats, **options)
+            else:
+                self.searchFunction = lambda x: func(x, heuristic=heur, **options)
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
             raise AttributeError(prob + ' is not a search problem type in SearchAgents.py.')
         self.searchType = globals()[prob]
         print('[SearchAgent] using problem type ' + prob)
+        self.print_stats = str(stats).lower() not in ('false', '0')
 
     def register_initial_state(self, state):
         """
@@ -115,10 +132,21 @@ class SearchAgent(Agent):
         if self.searchFunction is None: raise Exception("No search function provided for SearchAgent")
         start_time = time.time()
         problem = self.searchType(state) # Makes a new search problem
-        self.actions  = self.searchFunction(problem) # Find a path
+        self.search_stats = search.SearchStats()
+        if 'stats' in self.searchFunction.__code__.co_varnames:
+            self.actions  = self.searchFunction(problem, stats=self.search_stats) # Find a path
+        else:
+            # Search functions without a stats argument only report their expansions
+            self.actions  = self.searchFunction(problem) # Find a path
+            self.search_stats.algorithm = getattr(self.searchFunction, '__name__', None)
+            self.search_stats.expanded = getattr(problem, '_expanded', 0)
+            self.search_stats.elapsed = time.time() - start_time
         total_cost = problem.get_cost_of_actions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (total_cost, time.time() - start_time))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if getattr(problem, '_ara_bound', None) is not None:
+            print('Path cost is at most %.3f times the optimal cost' % problem._ara_bound)
+        if self.print_stats: print(self.search_stats.to_json())
 
     def get_action(self, state):
         """
@@ -156,6 +184,7 @@ class PositionSearchProblem(search.SearchProblem):
         goal: A position in the game_state
         """
         self.walls = game_state.get_walls()
+        self.neighbors = Actions.get_neighbor_table(self.walls)
         self.startState = game_state.get_pacman_position()
         if start is not None: self.startState = start
         self.goal = goal
@@ -195,15 +224,8 @@ class PositionSearchProblem(search.SearchProblem):
          cost of expanding to that successor
         """
 
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.direction_to_vector(action)
-            next_x, next_y = int(x + dx), int(y + dy)
-            if not self.walls[next_x][next_y]:
-                next_state = (next_x, next_y)
-                cost = self.cost_fn(next_state)
-                successors.append( ( next_state, action, cost) )
+        cost_fn = self.cost_fn
+        successors = [(next_state, action, cost_fn(next_state)) for next_state, action in self.neighbors[state]]
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -291,6 +313,8 @@ class CornersProblem(search.SearchProblem):
             if not starting_game_state.has_food(*corner):
                 print('Warning: no food in corner ' + str(corner))
         self._expanded = 0 # DO NOT CHANGE; Number of search nodes expanded
+        # The (next_position, action) pairs of every open cell, see Actions.get_neighbor_table
+        self.neighbors = Actions.get_neighbor_table(self.walls)
         # Please add any code here which you would like to use
         # in initializing the problem
         "*** YOUR CODE HERE ***"
@@ -329,6 +353,7 @@ class CornersProblem(search.SearchProblem):
             #   dx, dy = Actions.direction_to_vector(action)
             #   next_x, next_y = int(x + dx), int(y + dy)
             #   hits_wall = self.walls[next_x][next_y]
+            # Or, without computing positions: for next_position, action in self.neighbors[state[0]]
 
             "*** YOUR CODE HERE ***"
 
@@ -401,6 +426,7 @@ class FoodSearchProblem:
     def __init__(self, starting_game_state):
         self.start = (starting_game_state.get_pacman_position(), starting_game_state.get_food())
         self.walls = starting_game_state.get_walls()
+        self.neighbors = Actions.get_neighbor_table(self.walls)
         self.starting_game_state = starting_game_state
         self._expanded = 0 # DO NOT CHANGE
         self.heuristic_info = {} # A dictionary for the heuristic to store information
@@ -415,14 +441,10 @@ class FoodSearchProblem:
         """Returns successor states, the actions they require, and a cost of 1."""
         successors = []
         self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.direction_to_vector(direction)
-            next_x, next_y = int(x + dx), int(y + dy)
-            if not self.walls[next_x][next_y]:
-                next_food = state[1].copy()
-                next_food[next_x][next_y] = False
-                successors.append( ( ((next_x, next_y), next_food), direction, 1) )
+        for (next_x, next_y), direction in self.neighbors[state[0]]:
+            next_food = state[1].copy()
+            next_food[next_x][next_y] = False
+            successors.append( ( ((next_x, next_y), next_food), direction, 1) )
         return successors
 
     def get_cost_of_actions(self, actions):
@@ -439,6 +461,55 @@ class FoodSearchProblem:
             cost += 1
         return cost
 
+class BitmaskFoodSearchProblem(FoodSearchProblem):
+    """
+    A FoodSearchProblem whose remaining food is an int bitmask instead of a Grid.
+
+    The food cells of the starting state are numbered once, when the problem
+    is built: bit i of the mask is set while food_positions[i] still has food.
+    A search state is a tuple ( pacman_position, food_mask ), so successors are
+    built and hashed in O(1) instead of copying and hashing a whole Grid.
+
+    Heuristics written for FoodSearchProblem states can be used through
+    decode_state; see bitmask_food_heuristic.
+    """
+    def __init__(self, starting_game_state):
+        super().__init__(starting_game_state)
+        self.food_positions = starting_game_state.get_food().as_list()
+        self.food_bits = dict((position, 1 << i) for i, position in enumerate(self.food_positions))
+        self.start = (starting_game_state.get_pacman_position(), (1 << len(self.food_positions)) - 1)
+        # Position -> list of (next_position, direction, food bit of next_position)
+        self._moves = {}
+
+    def is_goal_state(self, state):
+        return state[1] == 0
+
+    def get_successors(self, state):
+        """Returns successor states, the actions they require, and a cost of 1."""
+        self._expanded += 1 # DO NOT CHANGE
+        position, food_mask = state
+        moves = self._moves.get(position)
+        if moves is None:
+            moves = [(next_position, direction, self.food_bits.get(next_position, 0))
+                     for next_position, direction in self.neighbors[position]]
+            self._moves[position] = moves
+        return [((next_position, food_mask & ~bit), direction, 1) for next_position, direction, bit in moves]
+
+    def get_food_positions(self, food_mask):
+        """Returns the list of positions that still have food in food_mask."""
+        return [position for i, position in enumerate(self.food_positions) if food_mask >> i & 1]
+
+    def get_food_grid(self, food_mask):
+        """Returns a Grid (see game.py) with the food left in food_mask."""
+        food_grid = Grid(self.walls.width, self.walls.height)
+        for x, y in self.get_food_positions(food_mask):
+            food_grid[x][y] = True
+        return food_grid
+
+    def decode_state(self, state):
+        """Returns the FoodSearchProblem state ( pacman_position, foodGrid ) of 'state'."""
+        return (state[0], self.get_food_grid(state[1]))
+
 class AStarFoodSearchAgent(SearchAgent):
     """A SearchAgent for FoodSearchProblem using A* and your food_heuristic"""
     def __init__(self):
@@ -502,6 +573,129 @@ def power_set(iterable):
     s = list(iterable)
     return chain.from_iterable(combinations(s, r) for r in range(len(s)+1))
 
+class FoodMSTHeuristic:
+    """
+    A heuristic for FoodSearchProblem and BitmaskFoodSearchProblem states:
+    the maze distance from Pacman to the nearest food plus the weight of a
+    minimum spanning tree of the remaining food under maze distances. Any
+    path that eats all the food first reaches some food and then connects
+    all of it, so the value is admissible, and it is also consistent.
+
+    The maze distances from every food cell of the starting state are
+    distance fields (see maze_distances), computed once. Spanning trees are
+    memoized by the bitmask of the remaining food. The food is numbered by
+    problem.food_positions and problem.food_bits when the problem has them,
+    as BitmaskFoodSearchProblem does, so that its masks are used as they
+    are. A tree for a set with one dot less than a memoized one is derived
+    from it: the edges that do not touch the eaten dot all stay in a
+    spanning tree of the smaller set, so only the pieces they leave apart
+    have to be joined again.
+    """
+
+    def __init__(self, problem):
+        walls = problem.walls
+        if hasattr(problem, 'food_bits'):
+            self.food_positions = problem.food_positions
+            self.food_bits = problem.food_bits
+        else:
+            self.food_positions = problem.starting_game_state.get_food().as_list()
+            self.food_bits = dict((position, 1 << i) for i, position in enumerate(self.food_positions))
+        self.fields = [maze_distances.distance_field(walls, position) for position in self.food_positions]
+        self.food_distances = [[field.get_distance(position) for position in self.food_positions]
+                               for field in self.fields]
+        # Food bitmask -> (weight, edges as (distance, i, j) tuples)
+        self.trees = {0: (0, ())}
+        self.derived = 0
+        self.computed = 0
+
+    def __call__(self, state):
+        position, food = state
+        food_mask = food if isinstance(food, int) else self.get_mask(food)
+        if food_mask == 0: return 0
+        nearest = min(self.fields[i].get_distance(position) for i in self.get_indices(food_mask))
+        return nearest + self.get_tree(food_mask)[0]
+
+    def get_mask(self, food_grid):
+        """Returns the bitmask of the food left in a food Grid."""
+        food_bits = self.food_bits
+        food_mask = 0
+        for position in food_grid.as_list():
+            food_mask |= food_bits[position]
+        return food_mask
+
+    def get_indices(self, food_mask):
+        return [i for i in range(len(self.food_positions)) if food_mask >> i & 1]
+
+    def get_tree(self, food_mask):
+        """Returns the (weight, edges) of a minimum spanning tree of the food in food_mask."""
+        tree = self.trees.get(food_mask)
+        if tree is None:
+            for eaten in range(len(self.food_positions)):
+                bit = 1 << eaten
+                if not food_mask & bit and (food_mask | bit) in self.trees:
+                    tree = self._remove_from_tree(self.trees[food_mask | bit][1], eaten, food_mask)
+                    self.derived += 1
+                    break
+            else:
+                tree = self._build_tree(self.get_indices(food_mask))
+                self.computed += 1
+            self.trees[food_mask] = tree
+        return tree
+
+    def _build_tree(self, indices):
+        # Prim's algorithm over the complete graph of the food cells
+        distances = self.food_distances
+        best = dict((i, (distances[indices[0]][i], indices[0])) for i in indices[1:])
+        edges = []
+        while best:
+            i = min(best, key=lambda j: best[j][0])
+            distance, parent = best.pop(i)
+            edges.append((distance, parent, i))
+            for j in best:
+                if distances[i][j] < best[j][0]:
+                    best[j] = (distances[i][j], i)
+        return sum(edge[0] for edge in edges), tuple(edges)
+
+    def _remove_from_tree(self, edges, eaten, food_mask):
+        # Kruskal's algorithm, starting from the edges that do not touch the
+        # eaten dot and then joining the pieces with the shortest edges
+        indices = self.get_indices(food_mask)
+        parents = dict((i, i) for i in indices)
+
+        def find(i):
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        kept = [edge for edge in edges if eaten != edge[1] and eaten != edge[2]]
+        for _, i, j in kept:
+            parents[find(i)] = find(j)
+        pieces = len(indices) - len(kept)
+        if pieces > 1:
+            distances = self.food_distances
+            candidates = sorted((distances[i][j], i, j) for a, i in enumerate(indices) for j in indices[a + 1:]
+                                if find(i) != find(j))
+            for distance, i, j in candidates:
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j:
+                    parents[root_i] = root_j
+                    kept.append((distance, i, j))
+                    pieces -= 1
+                    if pieces == 1: break
+        return sum(edge[0] for edge in kept), tuple(kept)
+
+def mst_food_heuristic(state, problem):
+    """
+    FoodMSTHeuristic of 'problem', kept in problem.heuristic_info so that it
+    lives as long as the problem.
+    """
+    engine = problem.heuristic_info.get('food_mst')
+    if engine is None:
+        engine = FoodMSTHeuristic(problem)
+        problem.heuristic_info['food_mst'] = engine
+    return engine(state)
+
 def food_heuristic(state, problem):
     """
     Your heuristic for the FoodSearchProblem goes here.
@@ -532,7 +726,15 @@ def food_heuristic(state, problem):
     """
     position, food_grid = state
     "*** YOUR CODE HERE ***"
-    return 0
+    return mst_food_heuristic(state, problem)
+
+def bitmask_food_heuristic(state, problem):
+    """
+    mst_food_heuristic for the states of a BitmaskFoodSearchProblem. The food
+    mask is passed as it is: FoodMSTHeuristic numbers the food like the
+    problem, so no food grid is built.
+    """
+    return mst_food_heuristic(state, problem)
 
 
 def simplified_corners_heuristic(state, problem):
@@ -561,20 +763,52 @@ def simplified_corners_heuristic(state, problem):
 class ClosestDotSearchAgent(SearchAgent):
     """Search for all food using a sequence of searches"""
     def register_initial_state(self, state):
+        """
+        Plans the whole sequence of closest dot paths with one distance field
+        from all the food (see maze_distances.DynamicDistanceField): from
+        Pacman's cell, walking to a neighbor one step closer to the food
+        always leads to a closest dot, and the field is repaired when the
+        dot is eaten. The plan is checked against the walls and food once it
+        is complete.
+        """
+        walls = state.get_walls()
+        neighbors = Actions.get_neighbor_table(walls)
+        field = maze_distances.DynamicDistanceField(walls, state.get_food().as_list())
+        position = state.get_pacman_position()
         self.actions = []
-        current_state = state
-        while current_state.get_food().count() > 0:
-            next_path_segment = self.find_path_to_closest_dot(current_state) # The missing piece
-            self.actions += next_path_segment
-            for action in next_path_segment:
-                legal = current_state.get_legal_actions()
-                if action not in legal:
-                    t = (str(action), str(current_state))
-                    raise Exception('find_path_to_closest_dot returned an illegal move: %s!\n%s' % t)
-                current_state = current_state.generate_successor(0, action)
+        field.remove_source(position)
+        while field.sources:
+            distance = field.get_distance(position)
+            if distance == float('inf'): break # The food left cannot be reached
+            while distance > 0:
+                for next_position, action in neighbors[position]:
+                    if field.get_distance(next_position) == distance - 1: break
+                self.actions.append(action)
+                position, distance = next_position, distance - 1
+            field.remove_source(position)
+        self.validate_plan(state, field.sources)
         self.action_index = 0
         print('Path found with cost %d.' % len(self.actions))
 
+    def validate_plan(self, state, unreachable_food):
+        """
+        Checks in a single pass that self.actions never walks into a wall and
+        eats all the food of 'state' except 'unreachable_food'.
+        """
+        walls = state.get_walls()
+        x, y = state.get_pacman_position()
+        remaining = set(state.get_food().as_list())
+        remaining.discard((x, y))
+        for action in self.actions:
+            dx, dy = Actions.direction_to_vector(action)
+            x, y = int(x + dx), int(y + dy)
+            if walls[x][y]:
+                t = (str(action), str(state))
+                raise Exception('ClosestDotSearchAgent planned an illegal move: %s!\n%s' % t)
+            remaining.discard((x, y))
+        if remaining != set(unreachable_food):
+            raise Exception('ClosestDotSearchAgent left food behind: %s' % str(sorted(remaining)))
+
     def find_path_to_closest_dot(self, game_state):
         """
         Returns a path (a list of actions) to the closest dot, starting from
@@ -589,6 +823,28 @@ class ClosestDotSearchAgent(SearchAgent):
         "*** YOUR CODE HERE ***"
         util.raise_not_defined()
 
+class ReplanningFoodAgent(Agent):
+    """
+    Eats the closest dot, choosing one move per turn with a D* Lite planner
+    (see incremental_search.py) that is repaired as Pacman moves, food is
+    eaten and ghosts move, instead of searching again every turn. The cells
+    of ghosts that are not scared are blocked.
+    """
+    def register_initial_state(self, state):
+        self.planner = incremental_search.DStarLite(state.get_walls(), state.get_pacman_position(),
+                                                    state.get_food().as_list())
+        self.blocked = set()
+
+    def get_action(self, state):
+        self.planner.move_start(state.get_pacman_position())
+        self.planner.set_goals(state.get_food().as_list())
+        blocked = set(util.nearest_point(ghost.get_position()) for ghost in state.get_ghost_states()
+                      if ghost.scared_timer == 0)
+        for cell in self.blocked - blocked: self.planner.set_cell_cost(cell, 1)
+        for cell in blocked - self.blocked: self.planner.set_cell_cost(cell, float('inf'))
+        self.blocked = blocked
+        return self.planner.get_next_action()
+
 class AnyFoodSearchProblem(PositionSearchProblem):
     """
     A search problem for finding a path to any food.
@@ -635,12 +891,17 @@ def maze_distance(point1, point2, game_state):
     Example usage: maze_distance( (2,4), (5,6), game_state)
 
     This might be a useful helper function for your ApproximateSearchAgent.
+
+    For full game states the distance is read from the precomputed all-pairs
+    table of the layout (see maze_distances.py) in O(1).
     """
     x1, y1 = point1
     x2, y2 = point2
     walls = game_state.get_walls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
+    if hasattr(game_state, 'data'):
+        return maze_distances.get_maze_distances(game_state).get_distance(point1, point2)
     prob = PositionSearchProblem(game_state, start=point1, goal=point2, warn=False, visualize=False)
     # return len(search.bfs(prob))
     return len(search.astar(problem=prob, heuristic=manhattan_heuristic))
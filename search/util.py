@@ -29,6 +29,7 @@
 import sys
 import inspect
 import heapq, random
+import os, tempfile
 
 
 class FixedRandom:
@@ -208,6 +209,140 @@ class PriorityQueue:
         else:
             self.push(item, priority)
 
+class IndexedPriorityQueue:
+    """
+      A drop-in replacement for PriorityQueue backed by an indexed binary heap.
+
+      Besides the heap, the queue keeps a map from each item to its heap entry,
+      and every entry records its own slot in the heap, so update() is a true
+      O(log n) decrease-key instead of a linear scan followed by a re-heapify.
+      Moving entries around the heap never rehashes the items. Items must be
+      hashable. Like PriorityQueue.push, push() always adds a new entry, so an
+      item pushed twice is queued twice; the map then holds the most recently
+      pushed copy, which is the one update(), set_priority(), remove() and
+      'in' act on. Ties between equal priorities are broken in insertion
+      order, exactly like PriorityQueue.
+    """
+    def  __init__(self):
+        # Entries are [priority, count, slot, item] lists; count is unique, so
+        # comparing two entries never looks past it.
+        self.heap = []
+        self.entries = {}
+        self.count = 0
+
+    def push(self, item, priority):
+        self._insert(item, priority)
+
+    def set_priority(self, item, priority):
+        """
+          Sets the priority of a queued item, raising or lowering it, or pushes
+          the item if it is not queued.
+        """
+        entry = self.entries.get(item)
+        if entry is None:
+            self._insert(item, priority)
+            return
+        old_priority = entry[0]
+        entry[0] = priority
+        entry[3] = item
+        if priority < old_priority:
+            self._sift_up(entry)
+        else:
+            self._sift_down(entry)
+
+    def pop(self):
+        entry = self.heap[0]
+        if self.entries.get(entry[3]) is entry:
+            del self.entries[entry[3]]
+        last = self.heap.pop()
+        if self.heap:
+            self.heap[0] = last
+            last[2] = 0
+            self._sift_down(last)
+        return entry[3]
+
+    def is_empty(self):
+        return len(self.heap) == 0
+
+    def __contains__(self, item):
+        return item in self.entries
+
+    def peek(self):
+        """
+          Returns the (item, priority) pair that pop() would return next,
+          without removing it.
+        """
+        entry = self.heap[0]
+        return entry[3], entry[0]
+
+    def remove(self, item):
+        """
+          Removes a queued item in O(log n).
+        """
+        entry = self.entries.pop(item)
+        last = self.heap.pop()
+        if last is not entry:
+            self.heap[entry[2]] = last
+            last[2] = entry[2]
+            self._sift_up(last)
+            self._sift_down(last)
+
+    def update(self, item, priority):
+        # Same contract as PriorityQueue.update: lower the priority of a queued
+        # item (keeping its original insertion order for ties), do nothing if
+        # it is already queued with an equal or lower priority, and push it
+        # otherwise. The stored item is replaced by 'item', so callers can
+        # attach new data (e.g. a cheaper parent) to an equal item.
+        entry = self.entries.get(item)
+        if entry is None:
+            self._insert(item, priority)
+            return
+        if entry[0] <= priority:
+            return
+        entry[0] = priority
+        entry[3] = item
+        self._sift_up(entry)
+
+    def _insert(self, item, priority):
+        entry = [priority, self.count, len(self.heap), item]
+        self.heap.append(entry)
+        self.entries[item] = entry
+        self.count += 1
+        self._sift_up(entry)
+
+    def _sift_up(self, entry):
+        heap = self.heap
+        position = entry[2]
+        while position > 0:
+            parent_position = (position - 1) >> 1
+            parent = heap[parent_position]
+            if entry >= parent:
+                break
+            heap[position] = parent
+            parent[2] = position
+            position = parent_position
+        heap[position] = entry
+        entry[2] = position
+
+    def _sift_down(self, entry):
+        heap = self.heap
+        size = len(heap)
+        position = entry[2]
+        child_position = 2 * position + 1
+        while child_position < size:
+            right_position = child_position + 1
+            if right_position < size and heap[right_position] < heap[child_position]:
+                child_position = right_position
+            child = heap[child_position]
+            if entry <= child:
+                break
+            heap[position] = child
+            child[2] = position
+            position = child_position
+            child_position = 2 * position + 1
+        heap[position] = entry
+        entry[2] = position
+
 class PriorityQueueWithFunction(PriorityQueue):
     """
     Implements a priority queue with the same push/pop signature of the
@@ -600,6 +735,29 @@ def pause():
     """
     input("<Press enter/return to continue>")
 
+def get_cache_path(file_name):
+    """
+    Returns the path of 'file_name' inside the on-disk cache that is shared by
+    repeated runs and worker processes. The cache directory is read from the
+    PACMAN_CACHE_DIR environment variable and defaults to 'pacman_cache' in the
+    system temporary directory. It is created if it does not exist.
+    """
+    cache_dir = os.environ.get('PACMAN_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'pacman_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, file_name)
+
+def write_cache_file(path, chunks):
+    """
+    Writes the byte strings in 'chunks' to the file at 'path' (see
+    get_cache_path). The bytes go to a private file that is then renamed, so
+    that concurrent workers never see a partially written file.
+    """
+    temporary_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(temporary_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(temporary_path, path)
+
 
 # code to handle timeouts
 #